@@ -0,0 +1,74 @@
+"""Замер пропускной способности поточного экспорта/импорта iCalendar.
+
+Запуск: python bench_ics.py [число_событий] [--memory]
+С --memory дополнительно измеряется пик памяти (tracemalloc сильно замедляет замер).
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import ics_format
+from storage import Task
+
+
+def generate_tasks(count):
+    """Генератор задач, чтобы сам замер не держал их все в памяти"""
+    start = datetime(2026, 1, 1, 12, 0)
+    priorities = ("High", "Medium", "Low")
+    for i in range(count):
+        yield Task(
+            title=f"Задача {i}, этап; проверка",
+            description="Описание\nв две строки" if i % 3 == 0 else "",
+            deadline=start + timedelta(minutes=17 * i),
+            priority=priorities[i % 3],
+            is_completed=i % 5 == 0
+        )
+
+
+def memory_report(trace_memory):
+    if not trace_memory:
+        return ""
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return f", пик памяти {peak / 1024:.0f} КБ"
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != "--memory"]
+    count = int(args[0]) if args else 500_000
+    trace_memory = "--memory" in sys.argv
+    fd, filename = tempfile.mkstemp(suffix=".ics")
+    os.close(fd)
+
+    try:
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            written = ics_format.write_ics(generate_tasks(count), f)
+        export_time = time.perf_counter() - started
+
+        size_mb = os.path.getsize(filename) / 1024 / 1024
+        print(f"Экспорт: {written} событий, {size_mb:.1f} МБ за {export_time:.2f} с "
+              f"({written / export_time:,.0f} событий/с){memory_report(trace_memory)}")
+
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        parsed = 0
+        with open(filename, 'r', encoding='utf-8') as f:
+            for _ in ics_format.iter_ics_tasks(f, Task):
+                parsed += 1
+        import_time = time.perf_counter() - started
+
+        print(f"Импорт:  {parsed} событий за {import_time:.2f} с "
+              f"({parsed / import_time:,.0f} событий/с){memory_report(trace_memory)}")
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
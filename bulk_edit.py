@@ -0,0 +1,91 @@
+from datetime import timedelta
+from typing import Callable, Dict, List
+
+from event_bus import ChangeEvent, ChangeType
+from storage import Task
+
+
+def shift_deadline(days: int) -> Callable:
+    delta = timedelta(days=days)
+
+    def change(task):
+        task.deadline = task.deadline + delta
+    return change
+
+
+def set_priority(priority: str) -> Callable:
+    def change(task):
+        task.priority = priority
+    return change
+
+
+def set_deadline(deadline) -> Callable:
+    def change(task):
+        task.deadline = deadline
+    return change
+
+
+def set_dependencies(depends_on: List[str]) -> Callable:
+    def change(task):
+        task.depends_on = list(depends_on)
+    return change
+
+
+def mark_completed(task):
+    task.is_completed = True
+
+
+class TaskTransaction:
+    """Пакетное изменение списка задач по принципу "все или ничего".
+
+    Перед первой правкой каждой задачи запоминается ее состояние, удаления
+    применяются к списку одним проходом. Если сохранение не удалось, rollback
+    возвращает задачи и список к исходному виду, а события не публикуются.
+    """
+
+    def __init__(self, tasks: List):
+        self.tasks = tasks
+        self.original_tasks = list(tasks)
+        # id -> (задача, словарь ее исходного состояния)
+        self.backups: Dict[str, tuple] = {}
+        self.added: Dict[str, object] = {}
+        self.updated: Dict[str, object] = {}
+        self.deleted: Dict[str, object] = {}
+
+    def backup(self, task):
+        if task.id not in self.backups:
+            self.backups[task.id] = (task, task.to_dict())
+
+    def add(self, task):
+        """Добавить задачу в список; при откате она уйдет вместе с восстановлением списка"""
+        self.tasks.append(task)
+        self.added[task.id] = task
+
+    def update(self, task, change: Callable):
+        self.backup(task)
+        change(task)
+        if task.id not in self.deleted and task.id not in self.added:
+            self.updated[task.id] = task
+
+    def delete(self, task):
+        self.backup(task)
+        self.updated.pop(task.id, None)
+        self.deleted[task.id] = task
+
+    def apply(self):
+        """Убрать удаленные задачи из списка (на месте: на список ссылаются виды)"""
+        if self.deleted:
+            self.tasks[:] = [task for task in self.tasks if task.id not in self.deleted]
+
+    def rollback(self):
+        for task, data in self.backups.values():
+            task.update_from(Task.from_dict(data))
+        self.tasks[:] = self.original_tasks
+
+    def events(self) -> List[ChangeEvent]:
+        return ([ChangeEvent(ChangeType.TASK_ADDED, task) for task in self.added.values()] +
+                [ChangeEvent(ChangeType.TASK_UPDATED, task) for task in self.updated.values()] +
+                [ChangeEvent(ChangeType.TASK_DELETED, task) for task in self.deleted.values()])
+
+    def __len__(self):
+        return len(self.added) + len(self.updated) + len(self.deleted)
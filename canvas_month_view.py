@@ -0,0 +1,189 @@
+import tkinter as tk
+import tkinter.font as tkfont
+import customtkinter as ctk
+from datetime import datetime
+from typing import Callable
+
+
+class CanvasMonthView(tk.Canvas):
+    """Сетка месяца, нарисованная на одном Canvas вместо десятков CTk-виджетов"""
+
+    CELL_WIDTH = 102
+    CELL_HEIGHT = 82
+    PADDING = 1
+    MAX_CHIPS = 2
+
+    # Цвета совпадают с виджетным режимом CustomCalendar (светлая, темная тема)
+    DAY_COLOR = ("gray90", "gray30")
+    OTHER_MONTH_COLOR = ("gray95", "gray20")
+    EMPTY_COLOR = ("gray86", "gray17")
+    TODAY_COLOR = ("#87CEEB", "#4682B4")
+    SELECTED_COLOR = ("gray70", "gray50")
+    TEXT_COLOR = ("gray10", "gray90")
+    TODAY_TEXT_COLOR = ("blue", "lightblue")
+    OTHER_TEXT_COLOR = ("gray60", "gray50")
+    SELECTED_TASK_BORDER = "#1F6AA5"
+
+    CONTROL_MASK = 0x0004
+
+    def __init__(self, parent, on_select: Callable, on_add_task: Callable, on_task_click: Callable,
+                 on_task_toggle: Callable = None):
+        super().__init__(parent, highlightthickness=0, borderwidth=0)
+
+        self.on_select = on_select
+        self.on_add_task = on_add_task
+        self.on_task_click = on_task_click
+        self.on_task_toggle = on_task_toggle
+
+        # Шрифты создаются один раз, а не на каждую ячейку
+        self.day_font = tkfont.Font(weight="bold", size=12)
+        self.other_day_font = tkfont.Font(weight="normal", size=12)
+        self.chip_font = tkfont.Font(size=8)
+        self.more_font = tkfont.Font(size=8)
+
+        # (row, col) -> (datetime, is_current_month)
+        self.cell_dates = {}
+        # date -> id прямоугольника ячейки текущего месяца
+        self.cell_items = {}
+        # id элемента чипа -> задача
+        self.chip_tasks = {}
+        # id выделенных задач (множество принадлежит календарю)
+        self.task_selection = set()
+        # Функция task -> bool: задача с отрицательным запасом (задает календарь)
+        self.is_late = None
+        self.selected_date = None
+        self.today = None
+
+        self.bind("<Button-1>", self.on_click)
+        self.bind("<Double-Button-1>", self.on_double_click)
+
+    def color(self, value):
+        """Выбрать цвет под текущую тему"""
+        if isinstance(value, tuple):
+            return value[0] if ctk.get_appearance_mode() == "Light" else value[1]
+        return value
+
+    def base_color(self, date):
+        if date == self.today:
+            return self.color(self.TODAY_COLOR)
+        return self.color(self.DAY_COLOR)
+
+    def begin(self, weeks):
+        """Очистить холст под новую сетку; ячейки затем рисуются render_cell в любом порядке.
+
+        weeks - список недель, каждая из 7 кортежей (день, datetime или None, текущий месяц).
+        """
+        self.delete("all")
+        self.cell_dates.clear()
+        self.cell_items.clear()
+        self.chip_tasks.clear()
+        self.selected_date = None
+        self.today = datetime.now().date()
+
+        self.configure(width=7 * self.CELL_WIDTH, height=len(weeks) * self.CELL_HEIGHT,
+                       bg=self.color(self.EMPTY_COLOR))
+
+    def render_cell(self, row, col, cell, get_tasks_for_date: Callable, color_calculator,
+                    get_overload_color: Callable = None):
+        day, date, is_current_month = cell
+        x0 = col * self.CELL_WIDTH + self.PADDING
+        y0 = row * self.CELL_HEIGHT + self.PADDING
+        x1 = x0 + self.CELL_WIDTH - 2 * self.PADDING
+        y1 = y0 + self.CELL_HEIGHT - 2 * self.PADDING
+
+        if date is None:
+            self.create_rectangle(x0, y0, x1, y1, outline="",
+                                  fill=self.color(self.EMPTY_COLOR))
+            return
+
+        self.cell_dates[(row, col)] = (date, is_current_month)
+
+        if is_current_month:
+            fill = self.base_color(date.date())
+            # Дату могли выбрать до того, как ячейка была нарисована
+            if date.date() == self.selected_date:
+                fill = self.color(self.SELECTED_COLOR)
+        else:
+            fill = self.color(self.OTHER_MONTH_COLOR)
+
+        rect = self.create_rectangle(x0, y0, x1, y1, outline="", fill=fill)
+
+        if date.date() == self.today:
+            text_color, font = self.TODAY_TEXT_COLOR, self.day_font
+        elif is_current_month:
+            text_color, font = self.TEXT_COLOR, self.day_font
+        else:
+            text_color, font = self.OTHER_TEXT_COLOR, self.other_day_font
+        self.create_text(x0 + 6, y0 + 4, anchor="nw", text=str(day),
+                         font=font, fill=self.color(text_color))
+
+        if not is_current_month:
+            return
+
+        self.cell_items[date.date()] = rect
+        overload_color = get_overload_color(date.date()) if get_overload_color else None
+        if overload_color:
+            self.itemconfigure(rect, outline=overload_color, width=2)
+        self.draw_chips(x0, y0, x1, get_tasks_for_date(date.date()), color_calculator)
+
+    def draw_chips(self, x0, y0, x1, day_tasks, color_calculator):
+        """Нарисовать цветные плашки задач и счетчик остальных"""
+        chip_y = y0 + 24
+        for task in day_tasks[:self.MAX_CHIPS]:
+            title = task.title[:12] + "..." if len(task.title) > 12 else task.title
+            if self.is_late and self.is_late(task):
+                title = "⚠ " + title
+            selected = task.id in self.task_selection
+            chip = self.create_rectangle(x0 + 2, chip_y, x1 - 2, chip_y + 18,
+                                         outline=self.SELECTED_TASK_BORDER if selected else "",
+                                         width=2 if selected else 1,
+                                         fill=color_calculator.get_task_color(task))
+            label = self.create_text(x0 + 6, chip_y + 9, anchor="w", text=title,
+                                     font=self.chip_font, fill="black")
+            self.chip_tasks[chip] = task
+            self.chip_tasks[label] = task
+            chip_y += 20
+
+        if len(day_tasks) > self.MAX_CHIPS:
+            self.create_text((x0 + x1) / 2, chip_y + 6, text=f"+{len(day_tasks) - self.MAX_CHIPS} еще",
+                             font=self.more_font, fill=self.color(self.TEXT_COLOR))
+
+    def hit_test(self, event):
+        """Определить задачу и ячейку под курсором"""
+        x, y = self.canvasx(event.x), self.canvasy(event.y)
+
+        task = None
+        for item in reversed(self.find_overlapping(x, y, x, y)):
+            if item in self.chip_tasks:
+                task = self.chip_tasks[item]
+                break
+
+        cell = self.cell_dates.get((int(y // self.CELL_HEIGHT), int(x // self.CELL_WIDTH)))
+        return task, cell
+
+    def on_click(self, event):
+        task, cell = self.hit_test(event)
+        if task is not None:
+            if event.state & self.CONTROL_MASK and self.on_task_toggle:
+                self.on_task_toggle(task)
+            else:
+                self.on_task_click(task)
+            return
+
+        if cell and cell[1]:
+            self.on_select(cell[0].date())
+
+    def on_double_click(self, event):
+        task, cell = self.hit_test(event)
+        if task is None and cell and cell[1]:
+            self.on_add_task(cell[0])
+
+    def select(self, date):
+        """Подсветить выбранную дату, вернув прежней ее базовый цвет"""
+        if self.selected_date in self.cell_items:
+            self.itemconfigure(self.cell_items[self.selected_date],
+                               fill=self.base_color(self.selected_date))
+
+        if date in self.cell_items:
+            self.itemconfigure(self.cell_items[date], fill=self.color(self.SELECTED_COLOR))
+        self.selected_date = date
@@ -7,6 +7,11 @@ class ColorSchemeCalculator:
             "Low": "#44FF44"  # Зеленый
         }
         self.completed_color = "#888888"  # Серый
+        # Рамка перегруженных дней и недель поверх обычной раскраски ячеек
+        self.overload_colors = {
+            "day": "#D00000",  # Темно-красный
+            "week": "#B8860B"  # Темно-желтый
+        }
 
     def get_task_color(self, task):
         if task.is_completed:
@@ -14,4 +19,7 @@ class ColorSchemeCalculator:
         return self.priority_colors.get(task.priority, "#44FF44")
 
     def get_priority_color(self, priority):
-        return self.priority_colors.get(priority, "#44FF44")
\ No newline at end of file
+        return self.priority_colors.get(priority, "#44FF44")
+
+    def get_overload_color(self, level):
+        return self.overload_colors.get(level)
\ No newline at end of file
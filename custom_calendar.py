@@ -1,12 +1,25 @@
 import customtkinter as ctk
 from datetime import datetime, timedelta
 import calendar
+import time
+from collections import deque
 from typing import List, Callable
+from perf_monitor import perf_monitor, count_widgets
+from event_bus import ChangeType
+from canvas_month_view import CanvasMonthView
 
 
 class CustomCalendar(ctk.CTkFrame):
+    SELECTED_TASK_BORDER = "#1F6AA5"
+    # Бюджет одной порции отрисовки, чтобы ввод обрабатывался между порциями
+    FRAME_BUDGET_MS = 8
+
     def __init__(self, parent, tasks: List, color_calculator,
-                 on_task_click: Callable, on_date_click: Callable, on_add_task: Callable):
+                 on_task_click: Callable, on_date_click: Callable, on_add_task: Callable,
+                 event_bus=None, refresh_scheduler=None, renderer: str = "widgets",
+                 on_month_change: Callable = None, task_index=None, task_filter=None,
+                 on_task_toggle: Callable = None, task_selection=None, overload=None,
+                 dependencies=None):
         super().__init__(parent)
 
         self.tasks = tasks
@@ -14,6 +27,19 @@ class CustomCalendar(ctk.CTkFrame):
         self.on_task_click = on_task_click
         self.on_date_click = on_date_click
         self.on_add_task = on_add_task
+        # Вызывается перед отрисовкой нового месяца (например, для догрузки шардов)
+        self.on_month_change = on_month_change
+        # Индекс дедлайнов хранилища (DeadlineIndex) для выборки месяца без прохода по задачам
+        self.task_index = task_index
+        # Активные фильтры (TaskFilterIndex); None - показываем все
+        self.task_filter = task_filter
+        # Ctrl+клик по задаче добавляет ее в выделение для пакетных действий
+        self.on_task_toggle = on_task_toggle
+        self.task_selection = task_selection if task_selection is not None else set()
+        # Детектор перегрузки (OverloadDetector) для рамки перегруженных дней
+        self.overload = overload
+        # Граф зависимостей (DependencyGraph): задачи с отрицательным запасом помечаются
+        self.dependencies = dependencies
 
         self.current_date = datetime.now()
         self.selected_date = None  # Это свойство будет доступно извне
@@ -21,8 +47,20 @@ class CustomCalendar(ctk.CTkFrame):
 
         # Кэш для задач по дням
         self.tasks_cache = {}
-        # Флаг блокировки на время обновления
+        # Идет порционная отрисовка; ввод при этом не блокируется
         self.is_updating = False
+        # Оставшиеся шаги отрисовки и запланированная порция
+        self.render_steps = deque()
+        self.render_job = None
+        self.render_started = 0.0
+
+        self.refresh_scheduler = refresh_scheduler
+
+        # "widgets" - ячейки из CTk-виджетов, "canvas" - вся сетка на одном Canvas
+        self.renderer = renderer
+        self.canvas_view = None
+        if event_bus is not None:
+            event_bus.subscribe(self.on_tasks_changed)
 
         # Русские названия месяцев
         self.russian_months = {
@@ -71,16 +109,60 @@ class CustomCalendar(ctk.CTkFrame):
         year = self.current_date.year
         return f"{month_name} {year}"
 
+    @perf_monitor.timed("get_tasks_for_date")
     def get_tasks_for_date(self, date):
         """Получить задачи для даты с использованием кэша"""
         date_key = date.isoformat()
         if date_key not in self.tasks_cache:
+            show_completed = self.shows_completed()
             self.tasks_cache[date_key] = [
                 task for task in self.tasks
-                if task.deadline.date() == date and not task.is_completed
+                if task.deadline.date() == date and task.is_completed == show_completed
+                and self.matches_filter(task)
             ]
         return self.tasks_cache[date_key]
 
+    def get_overload_color(self, date):
+        """Цвет рамки перегруженного дня или недели (None - нагрузка в норме)"""
+        if self.overload is None:
+            return None
+        return self.color_calculator.get_overload_color(self.overload.level(date))
+
+    def is_late(self, task):
+        """Задача не успевает к дедлайну своей цепочки зависимостей"""
+        return self.dependencies is not None and self.dependencies.is_late(task.id)
+
+    def shows_completed(self):
+        """Сетка показывает открытые задачи, а при фильтре "выполненные" - только их"""
+        return self.task_filter is not None and self.task_filter.completion == "done"
+
+    def matches_filter(self, task):
+        return self.task_filter is None or self.task_filter.matches(task)
+
+    def prefill_tasks_cache(self):
+        """Заполнить кэш задач месяца одним запросом к индексу дедлайнов"""
+        if self.task_index is None:
+            return
+
+        first_day = self.current_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        next_month = (first_day + timedelta(days=32)).replace(day=1)
+
+        show_completed = self.shows_completed()
+        records = [record for record in self.task_index.range(first_day, next_month)
+                   if bool(record[2]) == show_completed]
+        month_tasks = self.task_index.resolve(records, self.tasks)
+        if month_tasks is None:
+            # Индекс устарел или разошелся со списком - обычный проход
+            return
+
+        day = first_day
+        while day < next_month:
+            self.tasks_cache[day.date().isoformat()] = []
+            day += timedelta(days=1)
+        for task in month_tasks:
+            if self.matches_filter(task):
+                self.tasks_cache[task.deadline.date().isoformat()].append(task)
+
     def get_previous_and_next_month_days(self, cal):
         """Получить дни предыдущего и следующего месяца для заполнения календаря"""
         first_week = cal[0]
@@ -111,108 +193,180 @@ class CustomCalendar(ctk.CTkFrame):
 
         return prev_month_days, next_month_days, prev_month
 
+    @perf_monitor.timed("update_calendar")
     def update_calendar(self):
-        if self.is_updating:
-            return
-
-        self.is_updating = True
-
-        # Блокируем кнопки на время обновления
-        self.prev_btn.configure(state="disabled")
-        self.next_btn.configure(state="disabled")
+        """Начать отрисовку месяца: сетка строится порциями в циклах простоя"""
+        # Незаконченная отрисовка прежнего состояния больше не нужна
+        self.cancel_render()
 
         # Очищаем кэш при обновлении календаря
         self.tasks_cache.clear()
+        self.prefill_tasks_cache()
 
-        # Clear previous calendar
-        for widget in self.calendar_frame.winfo_children():
-            widget.destroy()
+        # Clear previous calendar (Canvas переиспользуется между перерисовками)
+        if self.renderer != "canvas":
+            for widget in self.calendar_frame.winfo_children():
+                widget.destroy()
 
         # Update month label with Russian month name
         month_year = self.get_russian_month_year()
         self.month_label.configure(text=month_year)
 
-        # Reset selection when changing months
-        self.selected_date = None
+        # Выбор дня сбрасывается только при смене месяца: перерисовка после
+        # правки или фильтра оставляет список задач на выбранном дне
+        if self.selected_date is not None and (self.selected_date.year, self.selected_date.month) != \
+                (self.current_date.year, self.current_date.month):
+            self.selected_date = None
         self.selected_frame = None
 
         # Create calendar grid
         cal = calendar.monthcalendar(self.current_date.year, self.current_date.month)
 
-        # Получаем дни предыдущего и следующего месяца
-        prev_month_days, next_month_days, prev_month = self.get_previous_and_next_month_days(cal)
+        if self.renderer == "canvas":
+            self.render_steps = deque(self.canvas_render_steps(cal))
+        else:
+            self.render_steps = deque(self.widget_render_steps(cal))
+
+        self.is_updating = True
+        self.render_started = time.perf_counter()
+        # Первая порция - сразу, остальные - когда очередь событий пуста
+        self.render_slice()
+
+    def cancel_render(self):
+        """Прервать незаконченную отрисовку (например, при новом переключении месяца)"""
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+            self.render_job = None
+        self.render_steps.clear()
+        self.is_updating = False
+
+    def render_slice(self):
+        """Отрисовать ячейки в пределах бюджета кадра и запланировать следующую порцию"""
+        self.render_job = None
+        slice_end = time.perf_counter() + self.FRAME_BUDGET_MS / 1000
+
+        with perf_monitor.section("calendar_slice"):
+            while self.render_steps:
+                self.render_steps.popleft()()
+                if time.perf_counter() >= slice_end:
+                    break
+
+        if self.render_steps:
+            self.render_job = self.after_idle(self.render_slice)
+        else:
+            self.finish_render()
+
+    def finish_render(self):
+        self.is_updating = False
+        if perf_monitor.enabled:
+            perf_monitor.record("calendar_render", time.perf_counter() - self.render_started,
+                                count_widgets(self.calendar_frame))
+
+        # Автоматически показываем задачи на сегодняшний (или уже выбранный) день
+        if self.selected_date:
+            self.on_date_click(self.selected_date)
 
-        today_found = False
+    def widget_render_steps(self, cal):
+        """Шаги построения сетки из CTk-виджетов, по одной ячейке на шаг"""
+        weeks = self.get_month_cells(cal)
 
-        # Создаем все недели сразу
+        # Пустые строки размещаются сразу, чтобы ячейки вставали на свои места
         week_frames = []
-        for week_idx, week in enumerate(cal):
+        for week in weeks:
             week_frame = ctk.CTkFrame(self.calendar_frame)
+            week_frame.pack(fill="x", padx=1, pady=1)
             week_frames.append(week_frame)
 
-        # Отображаем все недели сразу для быстрой отрисовки
-        for week_frame in week_frames:
-            week_frame.pack(fill="x", padx=1, pady=1)
+        steps = []
+        for week_idx in range(len(weeks)):
+            for day, date, is_current_month in weeks[week_idx]:
+                steps.append(lambda f=week_frames[week_idx], d=day, dt=date, c=is_current_month:
+                             self.render_widget_cell(f, d, dt, c))
+        return steps
 
-        # Быстро создаем все ячейки
-        for week_idx, week in enumerate(cal):
-            week_frame = week_frames[week_idx]
+    def render_widget_cell(self, week_frame, day, date, is_current_month):
+        day_frame = ctk.CTkFrame(week_frame, width=100, height=80)
+        day_frame.pack(side="left", padx=1, pady=1)
+        day_frame.pack_propagate(False)
 
-            for day_idx, day in enumerate(week):
-                day_frame = ctk.CTkFrame(week_frame, width=100, height=80)
-                day_frame.pack(side="left", padx=1, pady=1)
-                day_frame.pack_propagate(False)
+        if date is None:
+            self.create_empty_day_widget(day_frame)
+            return
 
+        self.create_day_widget(day_frame, day, date, is_current_month)
+        if not is_current_month:
+            return
+
+        # Подсветка всех дней при загрузке
+        day_frame.configure(fg_color=("gray90", "gray30"))
+
+        # Особое выделение для сегодняшнего дня
+        is_today = date.date() == datetime.now().date()
+        if is_today:
+            day_frame.configure(fg_color=("#87CEEB", "#4682B4"))
+            # Выбираем сегодняшний день, если пользователь еще ничего не выбрал
+            if self.selected_date is None:
+                self.selected_date = date.date()
+                self.selected_frame = day_frame
+                return
+
+        # День, выбранный до перерисовки
+        if date.date() == self.selected_date:
+            self.selected_frame = day_frame
+            day_frame.configure(fg_color=("#9cd0e6", "#3a6a91") if is_today else ("gray70", "gray50"))
+
+    def get_month_cells(self, cal):
+        """Недели месяца в виде кортежей (день, datetime или None, текущий месяц)"""
+        prev_month_days, next_month_days, prev_month = self.get_previous_and_next_month_days(cal)
+        next_month = (self.current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+        weeks = []
+        for week_idx, week in enumerate(cal):
+            cells = []
+            for day_idx, day in enumerate(week):
                 if day != 0:
-                    # День текущего месяца
                     date = datetime(self.current_date.year, self.current_date.month, day)
-                    self.create_day_widget(day_frame, day, date, is_current_month=True)
-
-                    # Подсветка всех дней при загрузке
-                    day_frame.configure(fg_color=("gray90", "gray30"))
-
-                    # Особое выделение для сегодняшнего дня
-                    if date.date() == datetime.now().date():
-                        day_frame.configure(fg_color=("#87CEEB", "#4682B4"))
-                        # Запоминаем сегодняшний день для автоматического выбора
-                        if not today_found:
-                            self.selected_date = date.date()
-                            self.selected_frame = day_frame
-                            day_frame.configure(fg_color=("#87CEEB", "#4682B4"))
-                            today_found = True
+                    cells.append((day, date, True))
+                elif week_idx == 0 and prev_month_days[day_idx] != 0:
+                    prev_day = prev_month_days[day_idx]
+                    cells.append((prev_day, prev_month.replace(day=prev_day), False))
+                elif week_idx != 0 and next_month_days[day_idx] != 0:
+                    next_day = next_month_days[day_idx]
+                    cells.append((next_day, next_month.replace(day=next_day), False))
                 else:
-                    # День предыдущего или следующего месяца
-                    if week_idx == 0:
-                        # Первая неделя - дни предыдущего месяца
-                        prev_day = prev_month_days[day_idx]
-                        if prev_day != 0:
-                            prev_month_date = prev_month.replace(day=prev_day)
-                            self.create_day_widget(day_frame, prev_day, prev_month_date, is_current_month=False)
-                        else:
-                            self.create_empty_day_widget(day_frame)
-                    else:
-                        # Последние недели - дни следующего месяца
-                        next_day = next_month_days[day_idx]
-                        if next_day != 0:
-                            next_month = (self.current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-                            next_month_date = next_month.replace(day=next_day)
-                            self.create_day_widget(day_frame, next_day, next_month_date, is_current_month=False)
-                        else:
-                            self.create_empty_day_widget(day_frame)
-
-        # Автоматически показываем задачи на сегодняшний день после создания интерфейса
-        if today_found and self.selected_date:
-            # Используем after чтобы дать время на создание всего интерфейса
-            self.after(10, lambda: self.on_date_click(self.selected_date))
-
-        # Разблокируем кнопки после завершения обновления
-        self.after(50, self.enable_navigation)
-
-    def enable_navigation(self):
-        """Включить навигацию после завершения обновления"""
-        self.is_updating = False
-        self.prev_btn.configure(state="normal")
-        self.next_btn.configure(state="normal")
+                    cells.append((0, None, False))
+            weeks.append(cells)
+
+        return weeks
+
+    def canvas_render_steps(self, cal):
+        """Шаги отрисовки сетки на одном Canvas, по одной ячейке на шаг"""
+        if self.canvas_view is None:
+            self.canvas_view = CanvasMonthView(self.calendar_frame, self.select_canvas_date,
+                                               self.add_task_for_date, self.on_task_click,
+                                               self.on_task_toggle)
+            self.canvas_view.task_selection = self.task_selection
+            self.canvas_view.is_late = self.is_late
+            self.canvas_view.pack(padx=1, pady=1)
+
+        weeks = self.get_month_cells(cal)
+        self.canvas_view.begin(weeks)
+        # Выбранный день подсвечивается, когда до него дойдет отрисовка
+        self.canvas_view.selected_date = self.selected_date
+
+        steps = []
+        for row in range(len(weeks)):
+            for col, cell in enumerate(weeks[row]):
+                steps.append(lambda r=row, c=col, cell=cell: self.render_canvas_cell(r, c, cell))
+        return steps
+
+    def render_canvas_cell(self, row, col, cell):
+        self.canvas_view.render_cell(row, col, cell, self.get_tasks_for_date,
+                                     self.color_calculator, self.get_overload_color)
+
+        today = datetime.now().date()
+        if self.selected_date is None and today in self.canvas_view.cell_items:
+            self.selected_date = today
 
     def create_day_widget(self, parent, day, date, is_current_month=True):
         # Store the date in the frame for reference
@@ -238,6 +392,10 @@ class CustomCalendar(ctk.CTkFrame):
 
         # Показываем задачи только для дней текущего месяца
         if is_current_month:
+            overload_color = self.get_overload_color(date.date())
+            if overload_color:
+                parent.configure(border_width=2, border_color=overload_color)
+
             # Tasks for this day (используем кэшированную версию)
             day_tasks = self.get_tasks_for_date(date.date())
 
@@ -247,15 +405,20 @@ class CustomCalendar(ctk.CTkFrame):
 
                 task_btn = ctk.CTkButton(
                     parent,
-                    text=task.title[:12] + "..." if len(task.title) > 12 else task.title,
+                    text=("⚠ " if self.is_late(task) else "") +
+                         (task.title[:12] + "..." if len(task.title) > 12 else task.title),
                     fg_color=task_color,
                     text_color="black",
                     height=18,
                     font=ctk.CTkFont(size=9),
-                    anchor="w"
+                    anchor="w",
+                    border_width=2 if task.id in self.task_selection else 0,
+                    border_color=self.SELECTED_TASK_BORDER
                 )
                 task_btn.pack(fill="x", padx=1, pady=1)
                 task_btn.configure(command=lambda t=task: self.on_task_click(t))
+                if self.on_task_toggle:
+                    task_btn.bind("<Control-Button-1>", lambda e, t=task: self.on_task_toggle(t))
 
             # Show "+ more" if there are more tasks
             if len(day_tasks) > 2:
@@ -282,9 +445,6 @@ class CustomCalendar(ctk.CTkFrame):
         empty_label.pack(expand=True)
 
     def select_date(self, date, frame):
-        if self.is_updating:
-            return
-
         # Reset ALL day frames to base highlight first
         for week_frame in self.calendar_frame.winfo_children():
             for day_frame in week_frame.winfo_children():
@@ -304,36 +464,50 @@ class CustomCalendar(ctk.CTkFrame):
 
         self.on_date_click(date)
 
+    def select_canvas_date(self, date):
+        """Выбор даты в режиме Canvas"""
+        self.canvas_view.select(date)
+        self.selected_date = date
+
+        self.on_date_click(date)
+
     def add_task_for_date(self, date):
         """Открыть окно добавления задачи с предзаполненной датой"""
-        if self.is_updating:
-            return
         self.on_add_task(date)
 
     def prev_month(self):
-        if self.is_updating:
-            return
-
+        # Незаконченная отрисовка текущего месяца прерывается в update_calendar
         self.current_date = self.current_date.replace(day=1) - timedelta(days=1)
         self.current_date = self.current_date.replace(day=1)
+        self.notify_month_change()
         self.update_calendar()
 
     def next_month(self):
-        if self.is_updating:
-            return
-
         next_month = self.current_date.month + 1
         next_year = self.current_date.year
         if next_month > 12:
             next_month = 1
             next_year += 1
         self.current_date = self.current_date.replace(year=next_year, month=next_month, day=1)
+        self.notify_month_change()
         self.update_calendar()
 
-    def update_tasks(self, tasks):
-        if self.is_updating:
-            return
+    def notify_month_change(self):
+        if self.on_month_change:
+            self.on_month_change(self.current_date)
 
+    def on_tasks_changed(self, event):
+        """Обработчик событий шины: помечает сетку устаревшей"""
+        if event.type == ChangeType.TASKS_REPLACED:
+            self.tasks = event.tasks
+
+        if self.refresh_scheduler is not None:
+            self.refresh_scheduler.invalidate("calendar", lambda: self.update_tasks(self.tasks))
+        else:
+            self.update_tasks(self.tasks)
+
+    def update_tasks(self, tasks):
+        # Идущая отрисовка устарела и будет начата заново
         self.tasks = tasks
         self.tasks_cache.clear()  # Очищаем кэш при обновлении задач
         self.update_calendar()
\ No newline at end of file
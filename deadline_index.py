@@ -0,0 +1,201 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from file_sync import FileWatcher
+
+
+EPOCH = datetime(1970, 1, 1)
+
+PRIORITY_CODES = {"Low": 1, "Medium": 2, "High": 3}
+
+# magic, версия формата, размер записи, число записей, mtime_ns и размер основного файла
+HEADER = struct.Struct("<4sHHQqQ")
+# дедлайн (секунды от EPOCH), код приоритета, выполнена, позиция задачи в основном хранилище, хэш id
+RECORD = struct.Struct("<qBB6xQQ")
+MAGIC = b"DLIX"
+FORMAT_VERSION = 2
+
+
+def to_epoch(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(seconds=1)
+
+
+def id_hash(task_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(task_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def task_record(task, row: int) -> Tuple[int, int, int, int, int]:
+    return (to_epoch(task.deadline), PRIORITY_CODES.get(task.priority, 2),
+            1 if task.is_completed else 0, row, id_hash(task.id))
+
+
+class DeadlineIndex:
+    """Побочный бинарный индекс дедлайнов фиксированной ширины, открываемый через mmap.
+
+    Записи отсортированы по дедлайну, поэтому выборка диапазона - это бинарный
+    поиск по отображенному файлу: читаются только нужные страницы, а задачи
+    не десериализуются.
+    """
+
+    def __init__(self, filename: str, source: Optional[str] = None):
+        self.filename = filename
+        # Основной файл данных: индекс верен, только пока тот не менялся после записи индекса
+        self.source = source
+        self.file = None
+        self.map = None
+        self.count = 0
+        self.signature = (0, 0)
+        # Записи в памяти для инкрементального обновления файла
+        self.records: Optional[List[Tuple[int, int, int, int, int]]] = None
+        self.lock = threading.RLock()
+
+    def close(self):
+        with self.lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.count = 0
+
+    def open(self) -> bool:
+        """Открыть файл индекса; False, если его нет или заголовок поврежден"""
+        with self.lock:
+            self.close()
+            self.records = None
+            if not os.path.exists(self.filename) or os.path.getsize(self.filename) < HEADER.size:
+                return False
+
+            self.file = open(self.filename, 'rb')
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            magic, version, record_size, count, mtime_ns, size = HEADER.unpack_from(self.map, 0)
+            if (magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size
+                    or len(self.map) != HEADER.size + count * RECORD.size):
+                self.close()
+                return False
+
+            self.count = count
+            self.signature = (mtime_ns, size)
+            return True
+
+    def is_valid(self, task_count: int, signature: Tuple[int, int]) -> bool:
+        """Соответствует ли индекс текущему состоянию основного хранилища"""
+        with self.lock:
+            return self.map is not None and self.count == task_count and self.signature == signature
+
+    def is_current(self, task_count: int) -> bool:
+        """Годится ли индекс для списка из task_count задач прямо сейчас.
+
+        Задача, добавленная или перенесенная мимо индекса, не нашлась бы в
+        диапазоне, поэтому сверяются число записей и подпись основного файла.
+        """
+        if self.source is None:
+            return self.is_valid(task_count, self.signature)
+        return self.is_valid(task_count, FileWatcher.stat(self.source) or (0, 0))
+
+    def record_at(self, position: int) -> Tuple[int, int, int, int, int]:
+        return RECORD.unpack_from(self.map, HEADER.size + position * RECORD.size)
+
+    def epoch_at(self, position: int) -> int:
+        return struct.unpack_from("<q", self.map, HEADER.size + position * RECORD.size)[0]
+
+    def lower_bound(self, epoch: int) -> int:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.epoch_at(middle) < epoch:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def range(self, start: datetime, end: datetime) -> Iterator[Tuple[int, int, int, int, int]]:
+        """Записи с дедлайном в [start, end): (epoch, приоритет, выполнена, позиция, хэш id)"""
+        with self.lock:
+            if self.map is None:
+                return iter(())
+            end_epoch = to_epoch(end)
+            result = []
+            position = self.lower_bound(to_epoch(start))
+            while position < self.count:
+                record = self.record_at(position)
+                if record[0] >= end_epoch:
+                    break
+                result.append(record)
+                position += 1
+            return iter(result)
+
+    def resolve(self, records, tasks: List) -> Optional[List]:
+        """Сопоставить записи задачам списка по позиции.
+
+        Возвращает None, если индекс устарел или список разошелся с ним
+        (тогда нужен обычный проход).
+        """
+        if not self.is_current(len(tasks)):
+            return None
+        result = []
+        for record in records:
+            row = record[3]
+            if row >= len(tasks) or task_record(tasks[row], row) != record:
+                return None
+            result.append(tasks[row])
+        return result
+
+    def sync(self, tasks: List, signature: Tuple[int, int]):
+        """Привести файл к списку задач, перезаписав только изменившийся хвост"""
+        records = sorted(task_record(task, row) for row, task in enumerate(tasks))
+
+        with self.lock:
+            previous = self.records
+            if previous is None and self.map is not None:
+                previous = [self.record_at(i) for i in range(self.count)]
+            self.close()
+
+            first_changed = 0
+            if previous is not None and os.path.exists(self.filename):
+                limit = min(len(previous), len(records))
+                while first_changed < limit and previous[first_changed] == records[first_changed]:
+                    first_changed += 1
+                mode = 'r+b'
+            else:
+                mode = 'wb'
+                first_changed = 0
+
+            try:
+                with open(self.filename, mode) as f:
+                    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, len(records), *signature))
+                    f.seek(HEADER.size + first_changed * RECORD.size)
+                    f.write(b"".join(RECORD.pack(*record) for record in records[first_changed:]))
+                    f.truncate(HEADER.size + len(records) * RECORD.size)
+            except OSError as e:
+                print(f"Ошибка записи индекса: {e}")
+                return
+
+            self.open()
+            self.records = records
+
+    def reset(self):
+        """Закрыть и удалить индекс; до следующей перестройки выборки идут обычным проходом"""
+        with self.lock:
+            self.close()
+            self.records = None
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+
+    def rebuild(self, tasks: List, signature: Tuple[int, int]):
+        """Перестроить индекс с нуля (после неудачной проверки)"""
+        with self.lock:
+            self.close()
+            self.records = None
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            self.sync(tasks, signature)
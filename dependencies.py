@@ -0,0 +1,311 @@
+import heapq
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from event_bus import ChangeType
+
+
+class DependencyGraph:
+    """Граф зависимостей задач с поздними сроками начала.
+
+    Для каждой открытой задачи считается позднее окончание - ее дедлайн или
+    позднее начало любой открытой задачи, которая от нее зависит, если оно
+    раньше, - и позднее начало = позднее окончание минус оценка работы.
+    Запас - время от текущего момента до позднего начала; отрицательный запас
+    значит, что цепочка уже не успевает к дедлайну.
+
+    Полный расчет - обратный топологический проход O(V + E), при загрузке
+    он идет в фоновом потоке. Правка задачи пересчитывает только ее предков,
+    по убыванию глубины и с остановкой там, где позднее начало не изменилось.
+    """
+
+    def __init__(self, tasks: Iterable = ()):
+        # id -> id задач, от которых зависит задача (предшественники)
+        self.predecessors: Dict[str, Set[str]] = {}
+        # id -> id задач, которые зависят от задачи (последователи)
+        self.successors: Dict[str, Set[str]] = {}
+        # id -> (дедлайн, оценка, выполнена)
+        self.values: Dict[str, tuple] = {}
+        self.latest_start: Dict[str, datetime] = {}
+        # id -> длина самого длинного пути от задач без предшественников
+        self.depth: Dict[str, int] = {}
+
+        # Увеличивается при каждом пересчете (для опроса из UI-потока)
+        self.version = 0
+        # Номер последнего запущенного фонового расчета: результаты более ранних отбрасываются
+        self.generation = 0
+        self.rebuilding = False
+        # Правки, пришедшие во время фонового расчета: (id, снимок задачи или None)
+        self.queued: List[tuple] = []
+        self.lock = threading.RLock()
+
+        tasks = list(tasks)
+        if tasks:
+            self.rebuild(tasks)
+
+    @staticmethod
+    def snapshot(task) -> tuple:
+        """Поля задачи, нужные графу: фоновый поток не читает живые объекты задач"""
+        return (task.id, task.deadline, task.estimate_hours, bool(task.is_completed),
+                tuple(task.depends_on))
+
+    # --- структура графа ---
+
+    def set_node(self, snapshot: tuple):
+        """Обновить вершину и ее входящие ребра, не пересчитывая сроки"""
+        task_id, deadline, estimate, is_completed, depends_on = snapshot
+        self.values[task_id] = (deadline, estimate, is_completed)
+        self.successors.setdefault(task_id, set())
+
+        new_predecessors = set(depends_on)
+        new_predecessors.discard(task_id)
+        old_predecessors = self.predecessors.get(task_id, set())
+        for predecessor in old_predecessors - new_predecessors:
+            self.successors.get(predecessor, set()).discard(task_id)
+        for predecessor in new_predecessors - old_predecessors:
+            self.successors.setdefault(predecessor, set()).add(task_id)
+        self.predecessors[task_id] = new_predecessors
+
+    def remove_node(self, task_id: str):
+        for predecessor in self.predecessors.pop(task_id, set()):
+            self.successors.get(predecessor, set()).discard(task_id)
+        # Ссылки последователей на удаленную задачу остаются в их depends_on,
+        # но перестают влиять на расчет: вершины без значений пропускаются
+        self.values.pop(task_id, None)
+        self.latest_start.pop(task_id, None)
+        self.depth.pop(task_id, None)
+        if not self.successors.get(task_id):
+            self.successors.pop(task_id, None)
+
+    def rebuild(self, tasks: Iterable):
+        """Пересчитать граф целиком в текущем потоке"""
+        self.load([self.snapshot(task) for task in tasks])
+
+    def start_rebuild(self, tasks: Iterable):
+        """Пересчитать граф целиком в фоновом потоке; правки до его конца копятся в очереди"""
+        snapshots = [self.snapshot(task) for task in tasks]
+        with self.lock:
+            self.generation += 1
+            self.rebuilding = True
+            # Правки до этого момента уже вошли в снимок
+            self.queued.clear()
+            generation = self.generation
+        threading.Thread(target=self.load, args=(snapshots, generation), daemon=True).start()
+
+    def load(self, snapshots: List[tuple], generation: Optional[int] = None):
+        # Считаем в отдельном графе, чтобы не держать блокировку весь расчет
+        try:
+            fresh = DependencyGraph()
+            for snapshot in snapshots:
+                fresh.set_node(snapshot)
+            fresh.full_pass()
+        except Exception as e:
+            print(f"⚠️ Ошибка расчета зависимостей: {e}")
+            fresh = None
+
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                # Пока шел расчет, запустили новый: его снимок свежее, а очередь ждет его
+                return
+            try:
+                if fresh is not None:
+                    self.predecessors = fresh.predecessors
+                    self.successors = fresh.successors
+                    self.values = fresh.values
+                    self.latest_start = fresh.latest_start
+                    self.depth = fresh.depth
+
+                # Доигрываем правки, сделанные во время расчета
+                for task_id, snapshot in self.queued:
+                    self.apply(task_id, snapshot)
+            finally:
+                # Иначе правки копились бы в очереди, а UI ждал бы конца расчета вечно
+                self.queued.clear()
+                self.rebuilding = False
+                self.version += 1
+
+    # --- расчет сроков ---
+
+    def compute(self, task_id: str) -> Optional[datetime]:
+        """Позднее начало задачи по уже посчитанным срокам ее последователей"""
+        deadline, estimate, is_completed = self.values[task_id]
+        if is_completed:
+            return None
+
+        latest_finish = deadline
+        for successor in self.successors.get(task_id, ()):
+            successor_start = self.latest_start.get(successor)
+            if successor_start is not None and successor_start < latest_finish:
+                latest_finish = successor_start
+        try:
+            return latest_finish - timedelta(hours=estimate)
+        except OverflowError:
+            # Оценка уводит позднее начало за пределы календаря: цепочка безнадежно опаздывает
+            return datetime.min
+
+    def store(self, task_id: str, latest_start: Optional[datetime]) -> bool:
+        """Запомнить позднее начало; True, если оно изменилось"""
+        if latest_start == self.latest_start.get(task_id):
+            return False
+        if latest_start is None:
+            self.latest_start.pop(task_id, None)
+        else:
+            self.latest_start[task_id] = latest_start
+        return True
+
+    def full_pass(self):
+        """Топологический порядок (алгоритм Кана) и обратный проход по нему"""
+        waiting = {task_id: sum(1 for predecessor in self.predecessors[task_id]
+                                if predecessor in self.values)
+                   for task_id in self.values}
+        ready = deque(task_id for task_id, count in waiting.items() if count == 0)
+        order = []
+
+        while ready:
+            task_id = ready.popleft()
+            order.append(task_id)
+            depth = self.depth.get(task_id, 0)
+            for successor in self.successors.get(task_id, ()):
+                if successor in waiting:
+                    self.depth[successor] = max(self.depth.get(successor, 0), depth + 1)
+                    waiting[successor] -= 1
+                    if waiting[successor] == 0:
+                        ready.append(successor)
+
+        for task_id in self.values:
+            self.depth.setdefault(task_id, 0)
+
+        if len(order) < len(self.values):
+            # Цикл мог прийти только из файла, измененного вручную
+            print(f"⚠️ Циклические зависимости: {len(self.values) - len(order)} задач без расчета")
+
+        for task_id in reversed(order):
+            self.store(task_id, self.compute(task_id))
+
+    def update_depths(self, task_id: str):
+        """Поправить глубину задачи, у которой сменились предшественники, и ее потомков.
+
+        Потомки обходятся по возрастанию прежней глубины - это топологический
+        порядок, ведь входящие ребра поменялись только у самой задачи.
+        """
+        heap = [(self.depth.get(task_id, 0), task_id)]
+        queued = {task_id}
+        while heap:
+            _, current = heapq.heappop(heap)
+            queued.discard(current)
+            depth = max((self.depth.get(predecessor, 0) + 1 for predecessor in self.predecessors.get(current, ())
+                         if predecessor in self.values), default=0)
+            if depth == self.depth.get(current) and current != task_id:
+                continue
+            self.depth[current] = depth
+            for successor in self.successors.get(current, ()):
+                if successor in self.values and successor not in queued:
+                    queued.add(successor)
+                    heapq.heappush(heap, (self.depth.get(successor, 0), successor))
+
+    def update(self, seeds: Set[str]):
+        """Инкрементальный пересчет позднего начала после правки.
+
+        Вершины берутся по убыванию глубины, поэтому каждая считается один раз,
+        после всех своих затронутых последователей. Предки ставятся в очередь,
+        только если позднее начало изменилось.
+        """
+        heap = [(-self.depth.get(task_id, 0), task_id) for task_id in seeds if task_id in self.values]
+        heapq.heapify(heap)
+        queued = {task_id for _, task_id in heap}
+        # Защита от зацикливания на цикле, пришедшем из файла
+        budget = 2 * len(self.values) + len(heap)
+
+        while heap and budget > 0:
+            budget -= 1
+            _, task_id = heapq.heappop(heap)
+            queued.discard(task_id)
+            if not self.store(task_id, self.compute(task_id)):
+                continue
+            for predecessor in self.predecessors.get(task_id, ()):
+                if predecessor in self.values and predecessor not in queued:
+                    queued.add(predecessor)
+                    heapq.heappush(heap, (-self.depth.get(predecessor, 0), predecessor))
+
+    # --- проверки и результаты ---
+
+    def would_create_cycle(self, changes: Dict[str, List[str]]) -> bool:
+        """Появится ли цикл, если задачам из changes задать новые списки зависимостей"""
+        with self.lock:
+            new_predecessors = {task_id: set(deps) for task_id, deps in changes.items()}
+
+            def successors_of(task_id):
+                result = {successor for successor in self.successors.get(task_id, ())
+                          if successor not in new_predecessors}
+                result.update(changed_id for changed_id, deps in new_predecessors.items()
+                              if task_id in deps)
+                return result
+
+            # Поиск цикла обходом в глубину с тремя цветами от измененных вершин
+            state = {}
+            for start in new_predecessors:
+                if start in state:
+                    continue
+                stack = [(start, iter(successors_of(start)))]
+                state[start] = 1
+                while stack:
+                    task_id, children = stack[-1]
+                    child = next(children, None)
+                    if child is None:
+                        state[task_id] = 2
+                        stack.pop()
+                    elif state.get(child) == 1:
+                        return True
+                    elif child not in state:
+                        state[child] = 1
+                        stack.append((child, iter(successors_of(child))))
+            return False
+
+    def on_change(self, event):
+        """Подписчик шины событий: пересчет только затронутого подграфа"""
+        if event.type == ChangeType.TASKS_REPLACED:
+            self.start_rebuild(event.tasks)
+            return
+
+        task_id = event.task.id
+        snapshot = None if event.type == ChangeType.TASK_DELETED else self.snapshot(event.task)
+        with self.lock:
+            if self.rebuilding:
+                self.queued.append((task_id, snapshot))
+                return
+            self.apply(task_id, snapshot)
+            self.version += 1
+
+    def apply(self, task_id: str, snapshot: Optional[tuple]):
+        """Учесть правку одной задачи (snapshot None - задачу удалили)"""
+        old_predecessors = set(self.predecessors.get(task_id, ()))
+        if snapshot is None:
+            self.remove_node(task_id)
+            self.update(old_predecessors)
+            return
+
+        is_new = task_id not in self.values
+        self.set_node(snapshot)
+        if is_new or self.predecessors[task_id] != old_predecessors:
+            self.update_depths(task_id)
+        # Новые предшественники получили последователя, прежние - потеряли
+        self.update({task_id} | old_predecessors | self.predecessors[task_id])
+
+    def slack(self, task_id: str, now: Optional[datetime] = None) -> Optional[timedelta]:
+        """Запас до позднего начала (None - у задачи нет срока: выполнена или неизвестна)"""
+        latest_start = self.latest_start.get(task_id)
+        if latest_start is None:
+            return None
+        return latest_start - (now or datetime.now())
+
+    def is_late(self, task_id: str) -> bool:
+        """Задача из цепочки с отрицательным запасом; одиночная просроченная задача не в счет"""
+        if not self.has_dependencies(task_id):
+            return False
+        slack = self.slack(task_id)
+        return slack is not None and slack < timedelta(0)
+
+    def has_dependencies(self, task_id: str) -> bool:
+        return bool(self.predecessors.get(task_id)) or bool(self.successors.get(task_id))
@@ -0,0 +1,77 @@
+import customtkinter as ctk
+from perf_monitor import perf_monitor
+
+
+class DiagnosticsWindow(ctk.CTkToplevel):
+    """Скрытое окно диагностики производительности (Ctrl+Shift+D)"""
+
+    def __init__(self, parent, monitor=perf_monitor):
+        super().__init__(parent)
+
+        self.monitor = monitor
+
+        self.title("Диагностика")
+        self.geometry("640x480")
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        controls_frame = ctk.CTkFrame(self)
+        controls_frame.pack(fill="x", padx=10, pady=10)
+
+        self.enabled_var = ctk.BooleanVar(value=self.monitor.enabled)
+        enabled_cb = ctk.CTkCheckBox(controls_frame, text="Замеры включены",
+                                     variable=self.enabled_var,
+                                     command=self.toggle_enabled)
+        enabled_cb.pack(side="left", padx=5)
+
+        dump_btn = ctk.CTkButton(controls_frame, text="Сохранить в файл", width=130,
+                                 command=self.dump)
+        dump_btn.pack(side="right", padx=5)
+
+        reset_btn = ctk.CTkButton(controls_frame, text="Сбросить", width=90,
+                                  command=self.reset)
+        reset_btn.pack(side="right", padx=5)
+
+        refresh_btn = ctk.CTkButton(controls_frame, text="Обновить", width=90,
+                                    command=self.refresh)
+        refresh_btn.pack(side="right", padx=5)
+
+        self.report_text = ctk.CTkTextbox(self, font=ctk.CTkFont(family="Courier", size=12))
+        self.report_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    def toggle_enabled(self):
+        self.monitor.enabled = self.enabled_var.get()
+
+    def reset(self):
+        self.monitor.reset()
+        self.refresh()
+
+    def dump(self):
+        filename = ctk.filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if filename:
+            self.monitor.dump(filename)
+            print(f"🩺 Диагностика сохранена в: {filename}")
+
+    def refresh(self):
+        """Перерисовать отчет по текущим замерам"""
+        lines = [f"{'Участок':<28}{'Вызовы':>8}{'Всего, мс':>12}{'Сред., мс':>11}{'Макс., мс':>11}"]
+        for row in self.monitor.summary():
+            lines.append(f"{row['name']:<28}{row['calls']:>8}{row['total_ms']:>12.1f}"
+                         f"{row['avg_ms']:>11.2f}{row['max_ms']:>11.2f}")
+
+        lines.append("")
+        lines.append("Последние замеры:")
+        for record in reversed(self.monitor.recent(50)):
+            widgets = f"  виджетов: {record['widgets']}" if record["widgets"] is not None else ""
+            lines.append(f"{record['name']:<28}{record['duration_ms']:>10.2f} мс{widgets}")
+
+        self.report_text.configure(state="normal")
+        self.report_text.delete("1.0", "end")
+        self.report_text.insert("1.0", "\n".join(lines))
+        self.report_text.configure(state="disabled")
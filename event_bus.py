@@ -0,0 +1,82 @@
+from enum import Enum
+from typing import Callable, List, Optional
+
+
+class ChangeType(Enum):
+    TASK_ADDED = "task_added"
+    TASK_UPDATED = "task_updated"
+    TASK_DELETED = "task_deleted"
+    TASKS_REPLACED = "tasks_replaced"
+
+
+class ChangeEvent:
+    def __init__(self, change_type: ChangeType, task=None, tasks: Optional[List] = None):
+        self.type = change_type
+        self.task = task
+        # Полный новый список задач (для TASKS_REPLACED)
+        self.tasks = tasks
+
+    def __repr__(self):
+        return f"ChangeEvent({self.type.value}, task={getattr(self.task, 'id', None)})"
+
+
+class EventBus:
+    """Шина событий об изменении задач"""
+
+    def __init__(self):
+        self.subscribers: List[Callable] = []
+
+    def subscribe(self, callback: Callable):
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def publish(self, event: ChangeEvent):
+        for callback in list(self.subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Ошибка обработчика события {event}: {e}")
+
+
+class RefreshScheduler:
+    """Объединяет инвалидации и выполняет не более одного обновления каждого вида за цикл простоя"""
+
+    def __init__(self, widget):
+        self.widget = widget
+        # key -> callback; для одного ключа выполняется только последний callback
+        self.pending = {}
+        self.scheduled = None
+
+    def invalidate(self, key: str, callback: Callable):
+        """Пометить вид устаревшим и запланировать обновление"""
+        self.pending[key] = callback
+        if self.scheduled is None:
+            self.scheduled = self.widget.after_idle(self.flush)
+
+    def cancel(self, key: str):
+        self.pending.pop(key, None)
+
+    def flush(self):
+        """Выполнить все накопленные обновления"""
+        self.scheduled = None
+        done = set()
+
+        while True:
+            # Вид, повторно инвалидированный во время своего обновления, ждет следующего цикла
+            key = next((k for k in self.pending if k not in done), None)
+            if key is None:
+                break
+
+            callback = self.pending.pop(key)
+            done.add(key)
+            try:
+                callback()
+            except Exception as e:
+                print(f"Ошибка обновления {key}: {e}")
+
+        if self.pending and self.scheduled is None:
+            self.scheduled = self.widget.after_idle(self.flush)
@@ -0,0 +1,116 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Рекомендательная межпроцессная блокировка файла данных.
+
+    Реентерабельна внутри процесса: вложенные захваты только увеличивают счетчик.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.file = open(self.path, 'a+')
+                if fcntl is not None:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+                else:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+            except OSError as e:
+                # Без блокировки работаем как раньше, но не падаем
+                print(f"Ошибка блокировки файла: {e}")
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0 and self.file is not None:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            except OSError as e:
+                print(f"Ошибка снятия блокировки: {e}")
+            finally:
+                self.file.close()
+                self.file = None
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class FileWatcher:
+    """Дешевое обнаружение внешних изменений по mtime и размеру файлов"""
+
+    def __init__(self, *paths: str):
+        self.signatures: Dict[str, Optional[Tuple[int, int]]] = {}
+        for path in paths:
+            self.add(path)
+
+    @staticmethod
+    def stat(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def add(self, path: str):
+        """Начать следить за файлом, считая текущее состояние известным"""
+        self.signatures[path] = self.stat(path)
+
+    def changed(self) -> bool:
+        """Изменился ли хоть один файл с момента последнего refresh()"""
+        return any(self.stat(path) != signature for path, signature in self.signatures.items())
+
+    def refresh(self):
+        """Запомнить текущее состояние (после собственной записи или загрузки)"""
+        for path in self.signatures:
+            self.signatures[path] = self.stat(path)
+
+
+def diff_tasks(current: List, fresh: List):
+    """Сравнить задачи в памяти с загруженными заново по id.
+
+    Возвращает (добавленные, [(текущая, новая)] измененные, удаленные).
+    """
+    current_by_id = {task.id: task for task in current}
+    fresh_ids = set()
+
+    added = []
+    updated = []
+    for task in fresh:
+        fresh_ids.add(task.id)
+        old_task = current_by_id.get(task.id)
+        if old_task is None:
+            added.append(task)
+        elif old_task.to_dict() != task.to_dict():
+            updated.append((old_task, task))
+
+    deleted = [task for task in current if task.id not in fresh_ids]
+    return added, updated, deleted
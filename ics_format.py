@@ -0,0 +1,248 @@
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional, TextIO
+
+
+PRODID = "-//Deadline Calendar//RU"
+
+# RFC 5545: 1-4 высокий, 5 средний, 6-9 низкий, 0 - не задан
+PRIORITY_TO_ICS = {"High": 1, "Medium": 5, "Low": 9}
+
+COMPONENTS = ("VEVENT", "VTODO")
+
+
+def escape_text(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def unescape_text(value: str) -> str:
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            result.append("\n" if escaped in ("n", "N") else escaped)
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+def fold_line(line: str) -> str:
+    """Перенос строк длиннее 75 октетов (продолжение начинается с пробела)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Не режем многобайтовый символ UTF-8 пополам
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_datetime(value: datetime) -> str:
+    # Дедлайны хранятся в локальном времени, поэтому пишем "плавающее" время без Z
+    return (f"{value.year:04d}{value.month:02d}{value.day:02d}"
+            f"T{value.hour:02d}{value.minute:02d}{value.second:02d}")
+
+
+def parse_datetime(value: str) -> datetime:
+    # Разбираем срезами: strptime на сотнях тысяч событий заметно медленнее
+    value = value.strip()
+    year, month, day = int(value[0:4]), int(value[4:6]), int(value[6:8])
+    if len(value) == 8:
+        # Дата без времени - ставим 12:00, как диалог задачи по умолчанию
+        return datetime(year, month, day, 12)
+
+    if len(value) < 15 or value[8] != "T":
+        raise ValueError(f"некорректная дата: {value}")
+
+    result = datetime(year, month, day, int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if value.endswith("Z"):
+        return result.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return result
+
+
+def ics_priority_to_task(value: str) -> str:
+    try:
+        priority = int(value)
+    except ValueError:
+        return "Medium"
+    if 1 <= priority <= 4:
+        return "High"
+    if 6 <= priority <= 9:
+        return "Low"
+    return "Medium"
+
+
+def iter_ics_lines(tasks: Iterable, component: str = "VEVENT") -> Iterator[str]:
+    """Построчно сгенерировать календарь, не собирая документ в памяти"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    yield "BEGIN:VCALENDAR\r\n"
+    yield "VERSION:2.0\r\n"
+    yield f"PRODID:{PRODID}\r\n"
+
+    for task in tasks:
+        yield f"BEGIN:{component}\r\n"
+        yield fold_line(f"UID:{task.id}")
+        yield f"DTSTAMP:{stamp}\r\n"
+        if component == "VTODO":
+            yield f"DUE:{format_datetime(task.deadline)}\r\n"
+            yield f"STATUS:{'COMPLETED' if task.is_completed else 'NEEDS-ACTION'}\r\n"
+        else:
+            yield f"DTSTART:{format_datetime(task.deadline)}\r\n"
+            yield f"DTEND:{format_datetime(task.deadline)}\r\n"
+            # У VEVENT нет статуса COMPLETED, поэтому выполнение храним в X-свойстве
+            yield f"X-DEADLINE-COMPLETED:{'TRUE' if task.is_completed else 'FALSE'}\r\n"
+        yield fold_line(f"SUMMARY:{escape_text(task.title)}")
+        if task.description:
+            yield fold_line(f"DESCRIPTION:{escape_text(task.description)}")
+        yield f"PRIORITY:{PRIORITY_TO_ICS.get(task.priority, 5)}\r\n"
+        yield fold_line(f"CATEGORIES:{escape_text(task.category)}")
+        # RFC 9253: задача зависит от завершения связанной
+        for task_id in task.depends_on:
+            yield fold_line(f"RELATED-TO;RELTYPE=DEPENDS-ON:{task_id}")
+        if task.estimate_hours:
+            yield f"X-DEADLINE-ESTIMATE-HOURS:{task.estimate_hours:g}\r\n"
+        yield f"END:{component}\r\n"
+
+    yield "END:VCALENDAR\r\n"
+
+
+def write_ics(tasks: Iterable, stream: TextIO, component: str = "VEVENT") -> int:
+    """Записать задачи в поток событие за событием; вернуть число задач"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for task in tasks:
+            count += 1
+            yield task
+
+    stream.writelines(iter_ics_lines(counted(), component))
+    return count
+
+
+def iter_unfolded_lines(stream: TextIO) -> Iterator[str]:
+    """Склеить перенесенные строки, держа в памяти только одну логическую строку"""
+    current: Optional[str] = None
+    for raw_line in stream:
+        line = raw_line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def split_property(line: str):
+    """Разобрать 'NAME;PARAM=...:VALUE' на (NAME, VALUE)"""
+    name_part, _, value = line.partition(":")
+    name = name_part.split(";", 1)[0].upper()
+    return name, value
+
+
+def property_params(line: str) -> dict:
+    """Параметры свойства: 'NAME;RELTYPE=DEPENDS-ON:...' -> {'RELTYPE': 'DEPENDS-ON'}"""
+    name_part = line.partition(":")[0]
+    params = {}
+    for param in name_part.split(";")[1:]:
+        key, _, value = param.partition("=")
+        params[key.upper()] = value.upper()
+    return params
+
+
+def iter_ics_tasks(stream: TextIO, task_factory) -> Iterator:
+    """Поточно разобрать VEVENT/VTODO в задачи за постоянную память.
+
+    task_factory принимает именованные аргументы конструктора Task.
+    """
+    properties = None
+    component = None
+    # Глубина вложенных компонентов (VALARM), их свойства пропускаем
+    nested = 0
+
+    for line in iter_unfolded_lines(stream):
+        if not line:
+            continue
+
+        name, value = split_property(line)
+
+        if name == "BEGIN" and value.upper() in COMPONENTS:
+            component = value.upper()
+            properties = {}
+            continue
+
+        if properties is None:
+            continue
+
+        if name == "BEGIN":
+            nested += 1
+            continue
+        if nested:
+            if name == "END":
+                nested -= 1
+            continue
+
+        if name == "END" and value.upper() == component:
+            try:
+                yield build_task(properties, task_factory)
+            except (KeyError, ValueError) as e:
+                print(f"Ошибка импорта события {properties.get('UID', '')}: {e}")
+            properties = None
+            component = None
+            continue
+
+        if name == "RELATED-TO":
+            # Свойство может повторяться; без RELTYPE по RFC 5545 это PARENT
+            if property_params(line).get("RELTYPE") == "DEPENDS-ON":
+                properties.setdefault("DEPENDS-ON", []).append(value.strip())
+            continue
+
+        properties[name] = value
+
+
+def first_category(value: str) -> Optional[str]:
+    """Первая категория из списка через запятую (экранированные запятые не делят)"""
+    current = []
+    chars = iter(value)
+    for char in chars:
+        if char == "\\":
+            current.append(char + next(chars, ""))
+        elif char == ",":
+            break
+        else:
+            current.append(char)
+    return unescape_text("".join(current)).strip() or None
+
+
+def build_task(properties: dict, task_factory):
+    deadline_value = properties.get("DUE") or properties.get("DTSTART") or properties.get("DTEND")
+    if deadline_value is None:
+        raise KeyError("нет DUE/DTSTART")
+
+    is_completed = (properties.get("STATUS", "").upper() == "COMPLETED"
+                    or "COMPLETED" in properties
+                    or properties.get("X-DEADLINE-COMPLETED", "").upper() == "TRUE")
+
+    return task_factory(
+        task_id=properties.get("UID") or None,
+        title=unescape_text(properties.get("SUMMARY", "")) or "Без названия",
+        description=unescape_text(properties.get("DESCRIPTION", "")),
+        deadline=parse_datetime(deadline_value),
+        priority=ics_priority_to_task(properties.get("PRIORITY", "0")),
+        category=first_category(properties.get("CATEGORIES", "")),
+        is_completed=is_completed,
+        depends_on=properties.get("DEPENDS-ON"),
+        estimate_hours=float(properties.get("X-DEADLINE-ESTIMATE-HOURS", 0) or 0)
+    )
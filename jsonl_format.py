@@ -0,0 +1,112 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, TextIO, Tuple
+
+
+# Файлы меньше этого размера быстрее разобрать в текущем процессе,
+# чем платить за запуск пула и передачу результатов
+PARALLEL_THRESHOLD = 4 * 1024 * 1024
+
+
+class LineError:
+    """Ошибка разбора одной строки JSON Lines"""
+
+    def __init__(self, line_number: int, message: str):
+        self.line_number = line_number
+        self.message = message
+
+    def __str__(self):
+        return f"строка {self.line_number}: {self.message}"
+
+    def __repr__(self):
+        return f"LineError({self.line_number}, {self.message!r})"
+
+
+def write_jsonl(tasks: Iterable, stream: TextIO) -> int:
+    """Записать задачи по одной на строку; вернуть их число"""
+    count = 0
+    for task in tasks:
+        stream.write(json.dumps(task.to_dict(), ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def split_ranges(filename: str, parts: int) -> List[Tuple[int, int]]:
+    """Разбить файл на диапазоны байтов, границы которых совпадают с началом строк"""
+    size = os.path.getsize(filename)
+    if size == 0:
+        return []
+
+    bounds = [0]
+    with open(filename, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(size * i // parts)
+            f.readline()  # дочитываем до конца текущей строки
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_range(filename: str, start: int, end: int, factory: Callable):
+    """Разобрать диапазон файла (выполняется в процессе пула).
+
+    Возвращает (задачи, ошибки с номерами строк внутри диапазона, число строк).
+    """
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    lines = data.split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+
+    tasks = []
+    errors = []
+    for index, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            tasks.append(factory(json.loads(line)))
+        except (json.JSONDecodeError, UnicodeDecodeError, KeyError, ValueError, TypeError) as e:
+            errors.append((index, f"{type(e).__name__}: {e}"))
+
+    return tasks, errors, len(lines)
+
+
+def load_jsonl(filename: str, factory: Callable, workers: Optional[int] = None,
+               threshold: int = PARALLEL_THRESHOLD):
+    """Загрузить задачи из JSON Lines, большие файлы - параллельно по диапазонам.
+
+    Результаты собираются в исходном порядке строк. Возвращает (задачи, [LineError]).
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(filename)
+
+    if workers == 1 or size < threshold:
+        ranges = [(0, size)] if size else []
+        results = [parse_range(filename, start, end, factory) for start, end in ranges]
+    else:
+        # Несколько диапазонов на процесс сглаживают неравномерность строк
+        ranges = split_ranges(filename, workers * 4)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(parse_range,
+                                        [filename] * len(ranges),
+                                        [start for start, _ in ranges],
+                                        [end for _, end in ranges],
+                                        [factory] * len(ranges)))
+
+    tasks = []
+    errors = []
+    line_offset = 0
+    for range_tasks, range_errors, line_count in results:
+        tasks.extend(range_tasks)
+        errors.extend(LineError(line_offset + index, message) for index, message in range_errors)
+        line_offset += line_count
+
+    return tasks, errors
@@ -1,15 +1,31 @@
 import customtkinter as ctk
 from custom_calendar import CustomCalendar
 from task_dialog import TaskDialog
-from storage import StorageManager
+from storage import StorageManager, ShardedStorageManager, JsonLinesStorageManager
 from notification import NotificationManager
 from color_scheme import ColorSchemeCalculator
+from perf_monitor import perf_monitor, count_widgets
+from event_bus import EventBus, RefreshScheduler, ChangeEvent, ChangeType
+from file_sync import diff_tasks
+from sync_client import SyncClient, SyncService
+from task_filters import TaskFilterIndex
+from task_stats import TaskStats
+from bulk_edit import (TaskTransaction, shift_deadline, set_priority, set_deadline, set_dependencies,
+                       mark_completed)
+from task_dialog import DeleteConfirmationDialog
+from overload import OverloadDetector
+from dependencies import DependencyGraph
+import os
 import threading
 import time
 from datetime import datetime
 
 
 class DeadlineCalendarApp:
+    ALL_CATEGORIES = "Все категории"
+    # Попытки сохранить правку, если файл данных меняется извне во время записи
+    SAVE_ATTEMPTS = 3
+
     def __init__(self):
         ctk.set_appearance_mode("System")
         ctk.set_default_color_theme("blue")
@@ -22,15 +38,50 @@ class DeadlineCalendarApp:
         # Минимальный размер окна
         self.root.minsize(1050, 685)
 
-        self.storage = StorageManager()
+        # DEADLINE_CALENDAR_STORAGE=sharded - по файлу на месяц в каталоге data/,
+        # jsonl - data.jsonl с параллельным разбором
+        storage_mode = os.environ.get("DEADLINE_CALENDAR_STORAGE")
+        if storage_mode == "sharded":
+            self.storage = ShardedStorageManager()
+        elif storage_mode == "jsonl":
+            self.storage = JsonLinesStorageManager()
+        else:
+            self.storage = StorageManager()
         self.notification_manager = NotificationManager()
         self.color_calculator = ColorSchemeCalculator()
 
+        # Шина изменений и отложенное (по циклам простоя) обновление видов
+        self.events = EventBus()
+        self.refresh_scheduler = RefreshScheduler(self.root)
+
         self.tasks = self.storage.load_tasks()
 
+        # Индексы фильтров подписываются первыми, чтобы виды видели их уже обновленными
+        self.task_filters = TaskFilterIndex(self.tasks)
+        self.events.subscribe(self.task_filters.on_change)
+        # Счетчики статистики обновляются по тем же событиям, без пересчета списка
+        self.task_stats = TaskStats(self.tasks)
+        self.events.subscribe(self.task_stats.on_change)
+
+        # Перегрузка по дням и неделям: полный анализ в фоне, дальше - по событиям
+        self.overload = OverloadDetector()
+        self.events.subscribe(self.overload.on_change)
+        self.overload.start_rebuild(self.tasks)
+
+        # Зависимости: поздние сроки начала считаются в фоне, правка пересчитывает только предков
+        self.dependencies = DependencyGraph()
+        self.events.subscribe(self.dependencies.on_change)
+        self.dependencies.start_rebuild(self.tasks)
+
+        # id задач, выбранных для пакетных действий
+        self.selected_task_ids = set()
+
         self.setup_ui()
         self.start_background_services()
 
+        if self.storage.load_errors:
+            self.after(500, lambda: self.show_line_errors("Ошибки загрузки данных", self.storage.load_errors))
+
     def setup_ui(self):
         # Main frame
         main_frame = ctk.CTkFrame(self.root)
@@ -51,7 +102,14 @@ class DeadlineCalendarApp:
 
         # Calendar
         self.calendar = CustomCalendar(calendar_frame, self.tasks, self.color_calculator,
-                                       self.on_task_click, self.on_date_click, self.add_task_for_date)
+                                       self.on_task_click, self.on_date_click, self.add_task_for_date,
+                                       event_bus=self.events, refresh_scheduler=self.refresh_scheduler,
+                                       renderer=os.environ.get("DEADLINE_CALENDAR_RENDERER", "widgets"),
+                                       on_month_change=self.on_month_change,
+                                       task_index=self.storage.index, task_filter=self.task_filters,
+                                       on_task_toggle=self.toggle_task_selection,
+                                       task_selection=self.selected_task_ids,
+                                       overload=self.overload, dependencies=self.dependencies)
         self.calendar.pack(fill="both", expand=True, padx=5, pady=5)
 
         # Controls frame
@@ -64,18 +122,95 @@ class DeadlineCalendarApp:
                                 command=self.add_task)
         add_btn.pack(pady=10, padx=10, fill="x")
 
-        export_btn = ctk.CTkButton(controls_frame, text="Экспорт в JSON",
+        export_btn = ctk.CTkButton(controls_frame, text="Экспорт (JSON/ICS)",
                                    command=self.export_tasks)
         export_btn.pack(pady=5, padx=10, fill="x")
 
-        import_btn = ctk.CTkButton(controls_frame, text="Импорт из JSON",
+        import_btn = ctk.CTkButton(controls_frame, text="Импорт (JSON/ICS)",
                                    command=self.import_tasks)
         import_btn.pack(pady=5, padx=10, fill="x")
 
+        stats_btn = ctk.CTkButton(controls_frame, text="Статистика",
+                                  command=self.show_stats)
+        stats_btn.pack(pady=5, padx=10, fill="x")
+
+        overload_btn = ctk.CTkButton(controls_frame, text="Перегрузка и переносы",
+                                     command=self.show_overload)
+        overload_btn.pack(pady=5, padx=10, fill="x")
+
+        # Фильтры по приоритету, выполнению и категории
+        filters_frame = ctk.CTkFrame(controls_frame)
+        filters_frame.pack(fill="x", padx=10, pady=(5, 0))
+
+        ctk.CTkLabel(filters_frame, text="Фильтры:",
+                     font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=5)
+
+        priority_row = ctk.CTkFrame(filters_frame, fg_color="transparent")
+        priority_row.pack(fill="x", padx=5)
+
+        self.priority_filter_vars = {}
+        for priority, label in (("High", "Высокий"), ("Medium", "Средний"), ("Low", "Низкий")):
+            var = ctk.BooleanVar(value=True)
+            checkbox = ctk.CTkCheckBox(priority_row, text=label, variable=var, width=80,
+                                       checkbox_width=18, checkbox_height=18,
+                                       command=self.apply_filters)
+            checkbox.pack(side="left")
+            self.priority_filter_vars[priority] = var
+
+        self.completion_filter_var = ctk.StringVar(value="Все")
+        completion_filter = ctk.CTkSegmentedButton(filters_frame, values=["Все", "Открытые", "Выполненные"],
+                                                   variable=self.completion_filter_var,
+                                                   command=lambda value: self.apply_filters())
+        completion_filter.pack(fill="x", padx=5, pady=3)
+
+        self.category_filter_var = ctk.StringVar(value=self.ALL_CATEGORIES)
+        self.category_filter_menu = ctk.CTkOptionMenu(filters_frame, variable=self.category_filter_var,
+                                                      values=[self.ALL_CATEGORIES] + self.task_filters.all_categories(),
+                                                      command=lambda value: self.apply_filters())
+        self.category_filter_menu.pack(fill="x", padx=5, pady=(0, 5))
+
         # Tasks list for selected date
         self.tasks_list_frame = ctk.CTkFrame(controls_frame)
         self.tasks_list_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Пакетные действия (показываются, пока есть выбранные задачи)
+        self.bulk_frame = ctk.CTkFrame(controls_frame)
+
+        self.bulk_label = ctk.CTkLabel(self.bulk_frame, text="", font=ctk.CTkFont(weight="bold"))
+        self.bulk_label.pack(anchor="w", padx=5)
+
+        shift_row = ctk.CTkFrame(self.bulk_frame, fg_color="transparent")
+        shift_row.pack(fill="x", padx=5, pady=2)
+        self.shift_days_var = ctk.StringVar(value="1")
+        ctk.CTkEntry(shift_row, textvariable=self.shift_days_var, width=50).pack(side="left")
+        ctk.CTkButton(shift_row, text="Сдвинуть на дни", width=120,
+                      command=self.bulk_shift).pack(side="left", padx=5)
+
+        self.bulk_priority_var = ctk.StringVar(value="Приоритет...")
+        ctk.CTkOptionMenu(self.bulk_frame, variable=self.bulk_priority_var,
+                          values=["Высокий", "Средний", "Низкий"],
+                          command=self.bulk_set_priority).pack(fill="x", padx=5, pady=2)
+
+        actions_row = ctk.CTkFrame(self.bulk_frame, fg_color="transparent")
+        actions_row.pack(fill="x", padx=5, pady=2)
+        ctk.CTkButton(actions_row, text="Выполнено", width=80,
+                      command=self.bulk_complete).pack(side="left")
+        ctk.CTkButton(actions_row, text="Удалить", width=70, fg_color="#FF4444", hover_color="#CC3333",
+                      command=self.bulk_delete).pack(side="left", padx=5)
+        ctk.CTkButton(actions_row, text="Сброс", width=60, fg_color="transparent", border_width=1,
+                      text_color=("gray10", "gray90"),
+                      command=self.clear_task_selection).pack(side="left")
+
+        links_row = ctk.CTkFrame(self.bulk_frame, fg_color="transparent")
+        links_row.pack(fill="x", padx=5, pady=2)
+        ctk.CTkButton(links_row, text="Связать цепочкой", width=120,
+                      command=self.bulk_link_chain).pack(side="left")
+        ctk.CTkButton(links_row, text="Снять связи", width=90,
+                      command=self.bulk_unlink).pack(side="left", padx=5)
+
+        self.bulk_error_label = ctk.CTkLabel(self.bulk_frame, text="", text_color="#FF4444")
+        self.bulk_error_label.pack(anchor="w", padx=5)
+
         self.tasks_label = ctk.CTkLabel(self.tasks_list_frame, text="Задачи на выбранную дату:",
                                         font=ctk.CTkFont(weight="bold"))
         self.tasks_label.pack(pady=5)
@@ -83,20 +218,215 @@ class DeadlineCalendarApp:
         self.tasks_scrollable = ctk.CTkScrollableFrame(self.tasks_list_frame)
         self.tasks_scrollable.pack(fill="both", expand=True)
 
+        # Список задач дня тоже подписан на изменения
+        self.events.subscribe(self.on_tasks_changed)
+        self.events.subscribe(lambda event: self.refresh_scheduler.invalidate(
+            "category_filter", self.update_category_filter))
+        self.events.subscribe(lambda event: self.refresh_scheduler.invalidate("stats", self.refresh_stats))
+        self.stats_window = None
+        self.events.subscribe(lambda event: self.watch_overload())
+        self.overload_window = None
+        self.overload_version = None
+        self.overload_poll_pending = False
+        self.watch_overload()
+        self.events.subscribe(lambda event: self.watch_dependencies())
+        self.dependencies_version = None
+        self.dependencies_poll_pending = False
+        self.watch_dependencies()
+
+        # Окно задачи создается один раз при первом открытии
+        self.task_dialog = None
+
+        # Скрытое окно диагностики
+        self.diagnostics_window = None
+        self.root.bind("<Control-Shift-D>", lambda e: self.show_diagnostics())
+
     def on_task_click(self, task):
         """Обработчик клика по задаче"""
-        dialog = TaskDialog(self.root, task, self.save_task)
+        self.open_task_dialog(task)
 
     def on_date_click(self, date):
         """Обработчик клика по дате"""
-        # Используем after для отложенного обновления
-        self.after(10, lambda: self.show_tasks_for_date(date))
+        # Обновление списка объединяется с остальными в одном цикле простоя
+        self.refresh_scheduler.invalidate("day_list", lambda: self.show_tasks_for_date(date))
+
+    def on_tasks_changed(self, event):
+        """Обработчик событий шины для списка задач выбранной даты"""
+        if (event is not None and event.type == ChangeType.TASK_DELETED
+                and event.task.id in self.selected_task_ids):
+            self.selected_task_ids.discard(event.task.id)
+            self.update_bulk_panel()
+        if self.calendar.selected_date:
+            self.refresh_scheduler.invalidate(
+                "day_list", lambda: self.show_tasks_for_date(self.calendar.selected_date))
+
+    def on_month_change(self, date):
+        """Догрузить задачи месяца, на который перешел календарь"""
+        self.add_loaded_tasks(self.storage.ensure_month_loaded(date.year, date.month))
+
+    def apply_filters(self):
+        """Применить переключатели фильтров к сетке, списку дня и уведомлениям"""
+        priorities = {priority for priority, var in self.priority_filter_vars.items() if var.get()}
+        category = self.category_filter_var.get()
+        completion = {"Открытые": "open", "Выполненные": "done"}.get(self.completion_filter_var.get())
+
+        self.task_filters.set_filters(
+            priorities=None if len(priorities) == len(self.priority_filter_vars) else priorities,
+            categories=None if category == self.ALL_CATEGORIES else {category},
+            completion=completion
+        )
+
+        self.refresh_scheduler.invalidate("calendar", lambda: self.calendar.update_tasks(self.tasks))
+        if self.calendar.selected_date:
+            self.refresh_scheduler.invalidate(
+                "day_list", lambda: self.show_tasks_for_date(self.calendar.selected_date))
+
+    def update_category_filter(self):
+        """Обновить список категорий в фильтре"""
+        self.category_filter_menu.configure(values=[self.ALL_CATEGORIES] + self.task_filters.all_categories())
+
+    def task_categories(self):
+        return self.task_filters.all_categories() or ["Общая"]
+
+    def toggle_task_selection(self, task):
+        """Добавить задачу в выделение или убрать из него (Ctrl+клик, флажок в списке)"""
+        if task.id in self.selected_task_ids:
+            self.selected_task_ids.discard(task.id)
+        else:
+            self.selected_task_ids.add(task.id)
+        self.update_bulk_panel()
+        self.refresh_scheduler.invalidate("calendar", lambda: self.calendar.update_tasks(self.tasks))
+
+    def clear_task_selection(self):
+        self.selected_task_ids.clear()
+        self.update_bulk_panel()
+        self.refresh_scheduler.invalidate("calendar", lambda: self.calendar.update_tasks(self.tasks))
+        self.on_tasks_changed(None)
+
+    def update_bulk_panel(self):
+        """Показать панель пакетных действий, пока есть выбранные задачи"""
+        self.bulk_error_label.configure(text="")
+        if self.selected_task_ids:
+            self.bulk_label.configure(text=f"Выбрано задач: {len(self.selected_task_ids)}")
+            if not self.bulk_frame.winfo_ismapped():
+                self.bulk_frame.pack(fill="x", padx=10, pady=(5, 0), before=self.tasks_list_frame)
+        else:
+            self.bulk_frame.pack_forget()
+
+    def selected_tasks(self):
+        return [task for task in self.tasks if task.id in self.selected_task_ids]
+
+    def bulk_shift(self):
+        try:
+            days = int(self.shift_days_var.get())
+        except ValueError:
+            self.bulk_error_label.configure(text="Число дней должно быть целым")
+            return
+        self.apply_bulk(shift_deadline(days))
+
+    def bulk_set_priority(self, russian_priority):
+        self.bulk_priority_var.set("Приоритет...")
+        priority_mapping = {"Высокий": "High", "Средний": "Medium", "Низкий": "Low"}
+        self.apply_bulk(set_priority(priority_mapping[russian_priority]))
+
+    def bulk_complete(self):
+        self.apply_bulk(mark_completed)
+
+    def bulk_link_chain(self):
+        """Связать выбранные задачи в цепочку по дедлайнам: каждая зависит от предыдущей"""
+        chain = sorted(self.selected_tasks(), key=lambda task: task.deadline)
+        if len(chain) < 2:
+            self.bulk_error_label.configure(text="Для цепочки нужно выбрать две задачи или больше")
+            return
+
+        changes = {}
+        for previous, task in zip(chain, chain[1:]):
+            if previous.id not in task.depends_on:
+                changes[task.id] = task.depends_on + [previous.id]
+        if self.dependencies.would_create_cycle(changes):
+            self.bulk_error_label.configure(text="Связь создаст цикл зависимостей")
+            return
+
+        tasks_by_id = {task.id: task for task in chain}
+
+        def build(transaction):
+            for task_id, depends_on in changes.items():
+                transaction.update(tasks_by_id[task_id], set_dependencies(depends_on))
+
+        if not self.run_transaction(build):
+            self.bulk_error_label.configure(text="Не удалось сохранить, изменения отменены")
+
+    def bulk_unlink(self):
+        self.apply_bulk(set_dependencies([]))
+
+    def bulk_delete(self):
+        DeleteConfirmationDialog(self.root, f"Выбранные задачи: {len(self.selected_task_ids)}",
+                                 lambda: self.apply_bulk(delete=True))
+
+    def apply_bulk(self, change=None, delete=False):
+        """Применить действие ко всем выбранным задачам одной транзакцией"""
+        def build(transaction):
+            for task in self.selected_tasks():
+                if delete:
+                    transaction.delete(task)
+                else:
+                    transaction.update(task, change)
+
+        if not self.run_transaction(build):
+            self.bulk_error_label.configure(text="Не удалось сохранить, изменения отменены")
+            return
+
+        if delete:
+            self.selected_task_ids.clear()
+        self.update_bulk_panel()
+
+    @perf_monitor.timed("run_transaction")
+    def run_transaction(self, build):
+        """Выполнить пакет изменений по принципу "все или ничего".
+
+        Одна запись в хранилище, события публикуются только после успешного
+        сохранения, а перерисовка видов объединяется планировщиком в одну.
+        Если файл данных изменили извне, пакет откатывается и строится заново
+        поверх подтянутых изменений; build поэтому должен быть повторяемым.
+        """
+        with self.storage.lock:
+            for attempt in range(self.SAVE_ATTEMPTS):
+                self.sync_external_changes()
+
+                transaction = TaskTransaction(self.tasks)
+                try:
+                    build(transaction)
+                    transaction.apply()
+                    saved = self.storage.save_tasks(self.tasks)
+                except Exception as e:
+                    print(f"Ошибка пакетного изменения: {e}")
+                    saved = False
+
+                if saved:
+                    break
+                transaction.rollback()
+                # Хранилище отказывается писать поверх файла, измененного после подтягивания
+                if not self.storage.has_external_changes():
+                    # Шардированное хранилище могло успеть записать часть файлов
+                    self.storage.save_tasks(self.tasks)
+                    self.adopt_loaded_tasks()
+                    return False
+                print("⚠️ Файл данных изменен извне во время сохранения, изменения применяются заново")
+            else:
+                print("⚠️ Не удалось сохранить: файл данных постоянно меняется извне")
+                return False
+
+        for event in transaction.events():
+            self.events.publish(event)
+        self.adopt_loaded_tasks()
+        print(f"📦 Пакетно изменено задач: {len(transaction)}")
+        return True
 
     def add_task_for_date(self, date):
         """Добавить задачу на конкретную дату (по двойному клику)"""
         # Создаем datetime с временем по умолчанию (12:00)
         deadline = datetime.combine(date.date(), datetime.strptime("12:00", "%H:%M").time())
-        dialog = TaskDialog(self.root, None, self.save_task, preset_date=deadline)
+        self.open_task_dialog(preset_date=deadline)
 
     def add_task(self):
         """Добавить новую задачу"""
@@ -111,15 +441,29 @@ class DeadlineCalendarApp:
             # Если дата не выбрана, используем сегодняшнюю дату
             preset_date = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
 
-        dialog = TaskDialog(self.root, None, self.save_task, preset_date=preset_date)
-
+        self.open_task_dialog(preset_date=preset_date)
+
+    def open_task_dialog(self, task=None, preset_date=None):
+        """Показать окно задачи; оно строится при первом открытии и дальше переиспользуется"""
+        with perf_monitor.section("task_dialog_open"):
+            if self.task_dialog is None or not self.task_dialog.winfo_exists():
+                with perf_monitor.section("task_dialog_build"):
+                    self.task_dialog = TaskDialog(self.root, task, self.save_task, preset_date=preset_date,
+                                                  categories=self.task_categories())
+            else:
+                self.task_dialog.open(task, preset_date, self.task_categories())
+            # Замер включает раскладку окна, а не только создание виджетов
+            self.task_dialog.update_idletasks()
+
+    @perf_monitor.timed("show_tasks_for_date", lambda self: count_widgets(self.tasks_scrollable))
     def show_tasks_for_date(self, date):
         """Показать задачи для выбранной даты"""
         # Очищаем предыдущий список
         for widget in self.tasks_scrollable.winfo_children():
             widget.destroy()
 
-        date_tasks = [task for task in self.tasks if task.deadline.date() == date]
+        date_tasks = [task for task in self.tasks
+                      if task.deadline.date() == date and self.task_filters.matches(task)]
 
         # Обновляем заголовок
         self.tasks_label.configure(text=f"Задачи на {date.strftime('%d.%m.%Y')}:")
@@ -135,9 +479,16 @@ class DeadlineCalendarApp:
 
             color = self.color_calculator.get_task_color(task)
 
+            # Флажок выбора для пакетных действий
+            select_var = ctk.BooleanVar(value=task.id in self.selected_task_ids)
+            select_cb = ctk.CTkCheckBox(task_frame, text="", variable=select_var, width=20,
+                                        checkbox_width=18, checkbox_height=18,
+                                        command=lambda t=task: self.toggle_task_selection(t))
+            select_cb.pack(side="left", padx=(2, 0))
+
             # Main task info
             info_frame = ctk.CTkFrame(task_frame, fg_color=color)
-            info_frame.pack(fill="x", padx=1, pady=1)
+            info_frame.pack(side="left", fill="x", expand=True, padx=1, pady=1)
 
             # Конвертируем приоритет для отображения
             priority_mapping = {"High": "Высокий", "Medium": "Средний", "Low": "Низкий"}
@@ -153,6 +504,13 @@ class DeadlineCalendarApp:
                                       text_color="black")
             time_label.pack(side="right", padx=5, pady=2)
 
+            # Запас до позднего начала для задач из цепочек зависимостей
+            slack = self.dependencies.slack(task.id) if self.dependencies.has_dependencies(task.id) else None
+            if slack is not None:
+                slack_label = ctk.CTkLabel(info_frame, text=self.format_slack(slack),
+                                           text_color="#B00000" if slack.total_seconds() < 0 else "black")
+                slack_label.pack(side="right", padx=5, pady=2)
+
             # Клик по задаче
             task_frame.bind("<Button-1>", lambda e, t=task: self.on_task_click(t))
             info_frame.bind("<Button-1>", lambda e, t=task: self.on_task_click(t))
@@ -160,78 +518,281 @@ class DeadlineCalendarApp:
             time_label.bind("<Button-1>", lambda e, t=task: self.on_task_click(t))
 
     def save_task(self, task_data, original_task=None, delete=False):
-        """Сохранить или удалить задачу"""
+        """Сохранить или удалить задачу; False - изменение не сохранено и отменено"""
+        def apply_fields(task):
+            task.title = task_data["title"]
+            task.description = task_data["description"]
+            task.deadline = task_data["deadline"]
+            task.priority = task_data["priority"]
+            task.category = task_data["category"]
+            task.is_completed = task_data["is_completed"]
+            task.estimate_hours = task_data["estimate_hours"]
+
         if delete and original_task:
-            # Удаляем задачу
-            self.tasks.remove(original_task)
-            print(f"🗑️ Задача удалена: {original_task.title}")
+            def build(transaction):
+                # Задачу могли уже удалить извне
+                if original_task in self.tasks:
+                    transaction.delete(original_task)
+            message = f"🗑️ Задача удалена: {original_task.title}"
         elif original_task:
-            # Обновляем существующую задачу
-            original_task.title = task_data["title"]
-            original_task.description = task_data["description"]
-            original_task.deadline = task_data["deadline"]
-            original_task.priority = task_data["priority"]
-            original_task.is_completed = task_data["is_completed"]
-            print(f"✏️ Задача обновлена: {original_task.title}")
+            def build(transaction):
+                # Задачу удалили извне, пока она была открыта: правка побеждает
+                if original_task not in self.tasks:
+                    transaction.add(original_task)
+                transaction.update(original_task, apply_fields)
+            message = f"✏️ Задача обновлена: {task_data['title']}"
         else:
-            # Добавляем новую задачу
             from storage import Task
-            new_task = Task(
-                title=task_data["title"],
-                description=task_data["description"],
-                deadline=task_data["deadline"],
-                priority=task_data["priority"],
-                is_completed=task_data["is_completed"]
-            )
-            self.tasks.append(new_task)
-            print(f"✅ Задача добавлена: {new_task.title}")
-
-        self.storage.save_tasks(self.tasks)
-        # Отложенное обновление календаря
-        self.after(50, lambda: self.calendar.update_tasks(self.tasks))
-
-        # Обновляем список задач если дата выбрана
-        if self.calendar.selected_date:
-            self.after(100, lambda: self.show_tasks_for_date(self.calendar.selected_date))
+            new_task = Task(title=task_data["title"], deadline=task_data["deadline"])
+            apply_fields(new_task)
+
+            def build(transaction):
+                transaction.add(new_task)
+            message = f"✅ Задача добавлена: {new_task.title}"
+
+        if not self.run_transaction(build):
+            return False
+        print(message)
+        return True
+
+    def sync_external_changes(self):
+        """Подтянуть изменения файла данных, сделанные другим процессом или скриптом"""
+        if not self.storage.has_external_changes():
+            return False
+
+        fresh_tasks = self.storage.reload_tasks()
+        added, updated, deleted = diff_tasks(self.tasks, fresh_tasks)
+
+        # Меняем список на месте: календарь и уведомления держат ссылку на него
+        if deleted:
+            deleted_ids = {task.id for task in deleted}
+            self.tasks[:] = [task for task in self.tasks if task.id not in deleted_ids]
+        for task, fresh_task in updated:
+            task.update_from(fresh_task)
+        self.tasks.extend(added)
+
+        events = ([ChangeEvent(ChangeType.TASK_ADDED, task) for task in added] +
+                  [ChangeEvent(ChangeType.TASK_UPDATED, task) for task, _ in updated] +
+                  [ChangeEvent(ChangeType.TASK_DELETED, task) for task in deleted])
+        for event in events:
+            self.events.publish(event)
+
+        if events:
+            print(f"🔄 Внешние изменения: +{len(added)} ~{len(updated)} -{len(deleted)}")
+        return True
+
+    def apply_remote_changes(self, changes):
+        """Применить дельту, полученную с сервера синхронизации.
+
+        Слияние идет той же транзакцией, что и локальные правки: под блокировкой
+        хранилища и поверх изменений файла, сделанных извне.
+        """
+        from storage import Task
+
+        remote_tasks = {change["id"]: None if change["deleted"] else Task.from_dict(change["task"])
+                        for change in changes}
+
+        def build(transaction):
+            tasks_by_id = {task.id: task for task in self.tasks}
+            for task_id, remote_task in remote_tasks.items():
+                task = tasks_by_id.get(task_id)
+                if remote_task is None:
+                    if task is not None:
+                        transaction.delete(task)
+                elif task is None:
+                    transaction.add(remote_task)
+                elif task.to_dict() != remote_task.to_dict():
+                    transaction.update(task, lambda t, remote=remote_task: t.update_from(remote))
+
+        if not remote_tasks:
+            return
+        if not self.run_transaction(build):
+            print("⚠️ Изменения с сервера не сохранены")
+            return
+        print(f"🔁 Получено с сервера изменений: {len(remote_tasks)}")
+
+    def adopt_loaded_tasks(self):
+        """Добавить задачи, которые хранилище догрузило при сохранении"""
+        self.add_loaded_tasks(self.storage.take_loaded_tasks())
+
+    def add_loaded_tasks(self, new_tasks):
+        """Добавить догруженные задачи в список; индексы, счетчики и виды узнают о них из шины"""
+        self.tasks.extend(new_tasks)
+        for task in new_tasks:
+            self.events.publish(ChangeEvent(ChangeType.TASK_ADDED, task))
+
+    def poll_external_changes(self):
+        """Периодическая проверка mtime/размера файла данных"""
+        self.sync_external_changes()
+        # Автосохранение идет в фоновом потоке и не публикует события само
+        self.adopt_loaded_tasks()
+        self.after(2000, self.poll_external_changes)
+
+    def show_diagnostics(self):
+        """Открыть окно диагностики производительности"""
+        from diagnostics_window import DiagnosticsWindow
+
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.refresh()
+            self.diagnostics_window.deiconify()
+            self.diagnostics_window.lift()
+            return
+
+        self.diagnostics_window = DiagnosticsWindow(self.root)
+
+    def show_stats(self):
+        """Открыть панель статистики нагрузки"""
+        from stats_window import StatsWindow
+
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.refresh()
+            self.stats_window.deiconify()
+            self.stats_window.lift()
+            return
+
+        self.stats_window = StatsWindow(self.root, self.task_stats)
+
+    def refresh_stats(self):
+        """Обновить панель статистики (в режиме отладки - со сверкой с полным пересчетом)"""
+        self.task_stats.self_check(self.tasks)
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.refresh()
+
+    def poll_stats(self):
+        """Просроченные задачи появляются со временем, а не только по событиям"""
+        self.refresh_stats()
+        self.after(60000, self.poll_stats)
+
+    def watch_overload(self, polling=False):
+        """Дождаться фонового анализа перегрузки и перерисовать календарь с его результатом"""
+        if polling:
+            self.overload_poll_pending = False
+        if self.overload.rebuilding:
+            # Один опрос на все события, пришедшие во время анализа
+            if not self.overload_poll_pending:
+                self.overload_poll_pending = True
+                self.after(200, lambda: self.watch_overload(polling=True))
+            return
+        if self.overload.version != self.overload_version:
+            self.overload_version = self.overload.version
+            self.refresh_scheduler.invalidate("calendar", lambda: self.calendar.update_tasks(self.tasks))
+            if self.overload_window is not None and self.overload_window.winfo_exists():
+                self.refresh_scheduler.invalidate("overload", self.overload_window.refresh)
+
+    def watch_dependencies(self, polling=False):
+        """Дождаться фонового расчета зависимостей и перерисовать отметки опаздывающих задач"""
+        if polling:
+            self.dependencies_poll_pending = False
+        if self.dependencies.rebuilding:
+            # Один опрос на все события, пришедшие во время расчета
+            if not self.dependencies_poll_pending:
+                self.dependencies_poll_pending = True
+                self.after(200, lambda: self.watch_dependencies(polling=True))
+            return
+        if self.dependencies.version != self.dependencies_version:
+            self.dependencies_version = self.dependencies.version
+            self.refresh_scheduler.invalidate("calendar", lambda: self.calendar.update_tasks(self.tasks))
+            self.on_tasks_changed(None)
+
+    @staticmethod
+    def format_slack(slack):
+        """Запас в днях и часах; отрицательный - опоздание цепочки"""
+        hours = int(abs(slack.total_seconds()) // 3600)
+        text = f"{hours // 24}д {hours % 24}ч" if hours >= 24 else f"{hours}ч"
+        return f"⚠ опоздание {text}" if slack.total_seconds() < 0 else f"запас {text}"
+
+    def show_overload(self):
+        """Открыть окно перегрузки с предложениями переносов"""
+        from overload_window import OverloadWindow
+
+        if self.overload_window is not None and self.overload_window.winfo_exists():
+            self.overload_window.refresh()
+            self.overload_window.deiconify()
+            self.overload_window.lift()
+            return
+
+        self.overload_window = OverloadWindow(self.root, self.overload, lambda: self.tasks,
+                                              self.apply_moves, self.watch_overload)
+
+    def apply_moves(self, moves):
+        """Применить предложенные переносы одной транзакцией"""
+        def build(transaction):
+            for task, deadline in moves:
+                transaction.update(task, set_deadline(deadline))
+
+        return self.run_transaction(build)
 
     def export_tasks(self):
-        """Экспорт задач в JSON"""
+        """Экспорт задач в JSON или iCalendar (по расширению файла)"""
         filename = ctk.filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json")]
+            filetypes=[("JSON files", "*.json"), ("JSON Lines files", "*.jsonl"),
+                       ("iCalendar files", "*.ics")]
         )
         if filename:
-            self.storage.export_tasks(self.tasks, filename)
+            if filename.lower().endswith(".ics"):
+                self.storage.export_ics(self.tasks, filename)
+            elif filename.lower().endswith(".jsonl"):
+                self.storage.export_jsonl(self.tasks, filename)
+            else:
+                self.storage.export_tasks(self.tasks, filename)
             print(f"📤 Задачи экспортированы в: {filename}")
 
     def import_tasks(self):
-        """Импорт задач из JSON"""
+        """Импорт задач из JSON или iCalendar (по расширению файла)"""
         filename = ctk.filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json")]
+            filetypes=[("JSON files", "*.json"), ("JSON Lines files", "*.jsonl"),
+                       ("iCalendar files", "*.ics")]
         )
         if filename:
-            imported_tasks = self.storage.import_tasks(filename)
+            if filename.lower().endswith(".ics"):
+                imported_tasks = self.storage.import_ics(filename)
+            elif filename.lower().endswith(".jsonl"):
+                imported_tasks = self.storage.import_jsonl(filename)
+                if self.storage.import_errors:
+                    self.show_line_errors("Ошибки импорта", self.storage.import_errors)
+            else:
+                imported_tasks = self.storage.import_tasks(filename)
             if imported_tasks is not None:
+                self.selected_task_ids.clear()
+                self.update_bulk_panel()
                 self.tasks = imported_tasks
-                self.storage.save_tasks(self.tasks)
-                # Отложенное обновление календаря
-                self.after(50, lambda: self.calendar.update_tasks(self.tasks))
+                self.storage.replace_tasks(self.tasks)
+                self.events.publish(ChangeEvent(ChangeType.TASKS_REPLACED, tasks=self.tasks))
                 print(f"📥 Задачи импортированы из: {filename}")
 
+    def show_line_errors(self, title, errors):
+        """Показать строки, которые не удалось разобрать, с их номерами"""
+        window = ctk.CTkToplevel(self.root)
+        window.title(title)
+        window.geometry("500x300")
+
+        ctk.CTkLabel(window, text=f"Пропущено строк: {len(errors)}",
+                     font=ctk.CTkFont(weight="bold")).pack(pady=(10, 5))
+
+        errors_text = ctk.CTkTextbox(window)
+        errors_text.pack(fill="both", expand=True, padx=10, pady=5)
+        errors_text.insert("1.0", "\n".join(str(error) for error in errors[:500]))
+        errors_text.configure(state="disabled")
+
+        ctk.CTkButton(window, text="OK", command=window.destroy).pack(pady=10)
+
     def start_background_services(self):
         """Запуск фоновых сервисов"""
 
         def check_notifications():
             while True:
-                due_tasks = self.notification_manager.get_due_tasks(self.tasks)
-                for task in due_tasks:
-                    self.notification_manager.show_notification(task)
+                with perf_monitor.section("notifications"):
+                    due_tasks = self.notification_manager.get_due_tasks(self.tasks, self.storage.index,
+                                                                           self.task_filters)
+                    for task in due_tasks:
+                        self.notification_manager.show_notification(task)
                 time.sleep(60)  # Проверка каждую минуту
 
         notification_thread = threading.Thread(target=check_notifications, daemon=True)
         notification_thread.start()
 
-        # Автосохранение каждые 5 минут
+        # Автосохранение каждые 5 минут (не затирает файл, измененный извне)
         def auto_save():
             while True:
                 time.sleep(300)
@@ -240,6 +801,18 @@ class DeadlineCalendarApp:
         save_thread = threading.Thread(target=auto_save, daemon=True)
         save_thread.start()
 
+        # Отслеживание изменений файла данных другими процессами
+        self.after(2000, self.poll_external_changes)
+        self.after(60000, self.poll_stats)
+
+        # Синхронизация с общим сервером (python sync_server.py)
+        sync_url = os.environ.get("DEADLINE_CALENDAR_SYNC_URL")
+        if sync_url:
+            self.sync_service = SyncService(SyncClient(sync_url), lambda: self.tasks,
+                                            self.apply_remote_changes)
+            self.events.subscribe(self.sync_service.on_change)
+            self.sync_service.start(self.root)
+
     def after(self, ms, func):
         """Обертка для root.after"""
         return self.root.after(ms, func)
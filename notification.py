@@ -8,13 +8,24 @@ class NotificationManager:
     def __init__(self):
         self.shown_notifications = set()
 
-    def get_due_tasks(self, tasks: List) -> List:
+    def get_due_tasks(self, tasks: List, task_index=None, task_filter=None) -> List:
         now = datetime.now()
         due_tasks = []
 
+        # С индексом дедлайнов читаем только окно ближайших 3 дней
+        if task_index is not None:
+            records = [record for record in task_index.range(now, now + timedelta(days=3))
+                       if not record[2]]
+            window_tasks = task_index.resolve(records, tasks)
+            if window_tasks is not None:
+                tasks = window_tasks
+
         for task in tasks:
             if task.is_completed:
                 continue
+            # Отфильтрованные задачи не помечаем показанными: они напомнят о себе после снятия фильтра
+            if task_filter is not None and not task_filter.matches(task):
+                continue
 
             time_diff = task.deadline - now
             days_diff = time_diff.total_seconds() / (60 * 60 * 24)
@@ -0,0 +1,259 @@
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from event_bus import ChangeType
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def week_of(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class OverloadDetector:
+    """Поиск дней и недель, где открытых важных дедлайнов больше допустимого.
+
+    Полный анализ - проход заметающей прямой по отсортированным дедлайнам,
+    O(n log n), выполняется в фоновом потоке при загрузке и замене списка.
+    Правки учитываются инкрементально: меняются счетчики только затронутых
+    дня и недели.
+    """
+
+    # Уровни перегрузки для цветового слоя
+    DAY = "day"
+    WEEK = "week"
+
+    SUGGEST_WINDOW_DAYS = 14
+
+    def __init__(self, day_capacity: Optional[int] = None, week_capacity: Optional[int] = None,
+                 priorities: Iterable[str] = ("High",)):
+        self.day_capacity = day_capacity or env_int("DEADLINE_CALENDAR_DAY_CAPACITY", 3)
+        self.week_capacity = week_capacity or env_int("DEADLINE_CALENDAR_WEEK_CAPACITY", 10)
+        self.priorities = set(priorities)
+
+        # id -> день дедлайна учитываемой задачи
+        self.values: Dict[str, date] = {}
+        self.day_ids: Dict[date, Set[str]] = {}
+        self.week_counts: Dict[date, int] = {}
+        self.overloaded_days: Set[date] = set()
+        self.overloaded_weeks: Set[date] = set()
+
+        # Увеличивается при каждом изменении результата (для опроса из UI-потока)
+        self.version = 0
+        # Номер последнего запущенного полного анализа: результаты более ранних отбрасываются
+        self.generation = 0
+        self.rebuilding = False
+        # Правки, пришедшие во время фонового анализа: (id, день или None)
+        self.queued: List[Tuple[str, Optional[date]]] = []
+        self.lock = threading.RLock()
+
+    def counts(self, task) -> bool:
+        return not task.is_completed and task.priority in self.priorities
+
+    # --- полный анализ ---
+
+    def start_rebuild(self, tasks: Iterable):
+        """Запустить полный анализ в фоновом потоке.
+
+        В UI-потоке снимаются только пары (день, id); сортировка и проход идут в потоке.
+        """
+        items = [(task.deadline, task.id) for task in tasks if self.counts(task)]
+        with self.lock:
+            self.generation += 1
+            self.rebuilding = True
+            # Правки до этого момента уже вошли в снимок
+            self.queued.clear()
+            generation = self.generation
+        threading.Thread(target=self.rebuild, args=(items, generation), daemon=True).start()
+
+    def rebuild(self, items: List[Tuple[datetime, str]], generation: Optional[int] = None):
+        items.sort()
+
+        # Заметающая прямая: соседние дедлайны одного дня и одной недели идут подряд
+        values = {}
+        day_ids = {}
+        week_counts = {}
+        current_day = current_week = None
+        for deadline, task_id in items:
+            day = deadline.date()
+            if day != current_day:
+                current_day = day
+                day_ids[day] = set()
+                week = week_of(day)
+                if week != current_week:
+                    current_week = week
+                    week_counts[week] = 0
+            day_ids[day].add(task_id)
+            week_counts[current_week] += 1
+            values[task_id] = day
+
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                # Пока шел анализ, запустили новый: его снимок свежее, а очередь ждет его
+                return
+            self.values = values
+            self.day_ids = day_ids
+            self.week_counts = week_counts
+            self.overloaded_days = {day for day, ids in day_ids.items() if len(ids) > self.day_capacity}
+            self.overloaded_weeks = {week for week, count in week_counts.items()
+                                     if count > self.week_capacity}
+
+            # Доигрываем правки, сделанные во время анализа
+            for task_id, day in self.queued:
+                self.move(task_id, day)
+            self.queued.clear()
+            self.rebuilding = False
+            self.version += 1
+
+    # --- инкрементальные правки ---
+
+    def on_change(self, event):
+        """Подписчик шины событий"""
+        if event.type == ChangeType.TASKS_REPLACED:
+            self.start_rebuild(event.tasks)
+            return
+
+        task = event.task
+        day = None
+        if event.type != ChangeType.TASK_DELETED and self.counts(task):
+            day = task.deadline.date()
+
+        with self.lock:
+            if self.rebuilding:
+                self.queued.append((task.id, day))
+                return
+            if self.values.get(task.id) != day:
+                self.move(task.id, day)
+                self.version += 1
+
+    def move(self, task_id: str, day: Optional[date]):
+        """Перенести вклад задачи в счетчики другого дня (None - убрать)"""
+        old_day = self.values.pop(task_id, None)
+        if old_day is not None:
+            ids = self.day_ids[old_day]
+            ids.discard(task_id)
+            if not ids:
+                del self.day_ids[old_day]
+            self.week_counts[week_of(old_day)] -= 1
+            self.update_flags(old_day)
+
+        if day is not None:
+            self.values[task_id] = day
+            self.day_ids.setdefault(day, set()).add(task_id)
+            week = week_of(day)
+            self.week_counts[week] = self.week_counts.get(week, 0) + 1
+            self.update_flags(day)
+
+    def update_flags(self, day: date):
+        week = week_of(day)
+        if len(self.day_ids.get(day, ())) > self.day_capacity:
+            self.overloaded_days.add(day)
+        else:
+            self.overloaded_days.discard(day)
+        if self.week_counts.get(week, 0) > self.week_capacity:
+            self.overloaded_weeks.add(week)
+        else:
+            self.overloaded_weeks.discard(week)
+
+    def set_capacity(self, day_capacity: int, week_capacity: int):
+        """Сменить допустимую нагрузку; счетчики не пересчитываются, только флаги"""
+        with self.lock:
+            self.day_capacity = day_capacity
+            self.week_capacity = week_capacity
+            self.overloaded_days = {day for day, ids in self.day_ids.items() if len(ids) > day_capacity}
+            self.overloaded_weeks = {week for week, count in self.week_counts.items()
+                                     if count > week_capacity}
+            self.version += 1
+
+    # --- результаты ---
+
+    def level(self, day: date) -> Optional[str]:
+        """Уровень перегрузки дня для цветового слоя календаря"""
+        if day in self.overloaded_days:
+            return self.DAY
+        if week_of(day) in self.overloaded_weeks:
+            return self.WEEK
+        return None
+
+    def suggest_moves(self, tasks: List, now: Optional[datetime] = None) -> List[Tuple[object, datetime]]:
+        """Предложить переносы, выравнивающие нагрузку.
+
+        Лишние задачи перегруженного дня переносятся на ближайший более ранний
+        день, где есть запас и по дню, и по неделе: перенос раньше дедлайна его
+        не нарушает. Затем так же разгружаются недели, которые остались
+        перегруженными без перегруженных дней: их самые ранние задачи уходят
+        на свободные дни предыдущих недель. Время дня сохраняется, поэтому
+        на сегодня задача переносится, только если это время еще не прошло.
+        """
+        now = now or datetime.now()
+        today = now.date()
+        tasks_by_id = {task.id: task for task in tasks}
+
+        with self.lock:
+            day_counts = {day: len(ids) for day, ids in self.day_ids.items()}
+            week_counts = dict(self.week_counts)
+            overloaded = sorted((day, list(self.day_ids[day])) for day in self.overloaded_days
+                                if day >= today)
+            overloaded_weeks = sorted(week for week in self.overloaded_weeks
+                                      if week + timedelta(days=6) >= today)
+            week_ids = {week: [task_id for offset in range(7)
+                               if week + timedelta(days=offset) >= today
+                               for task_id in self.day_ids.get(week + timedelta(days=offset), ())]
+                        for week in overloaded_weeks}
+
+        moves = []
+        moved_ids = set()
+
+        def plan(task, before: date) -> bool:
+            """Найти задаче свободный день раньше before и учесть перенос в счетчиках"""
+            day = task.deadline.date()
+            earliest = today if task.deadline.time() > now.time() else today + timedelta(days=1)
+            target = self.find_free_day(before, earliest, day_counts, week_counts)
+            if target is None:
+                return False
+            day_counts[day] -= 1
+            week_counts[week_of(day)] -= 1
+            day_counts[target] = day_counts.get(target, 0) + 1
+            week_counts[week_of(target)] = week_counts.get(week_of(target), 0) + 1
+            moves.append((task, task.deadline - timedelta(days=(day - target).days)))
+            moved_ids.add(task.id)
+            return True
+
+        for day, ids in overloaded:
+            # Переносим самые ранние по времени задачи дня
+            day_tasks = sorted((tasks_by_id[task_id] for task_id in ids if task_id in tasks_by_id),
+                               key=lambda task: task.deadline)
+            excess = day_counts[day] - self.day_capacity
+            for task in day_tasks[:excess]:
+                if not plan(task, day):
+                    break
+
+        for week in overloaded_weeks:
+            excess = week_counts[week] - self.week_capacity
+            week_tasks = sorted((tasks_by_id[task_id] for task_id in week_ids[week]
+                                 if task_id in tasks_by_id and task_id not in moved_ids),
+                                key=lambda task: task.deadline)
+            for task in week_tasks[:max(excess, 0)]:
+                # Искать начинаем с конца предыдущей недели: внутри недели нагрузка не меняется
+                if not plan(task, week):
+                    break
+        return moves
+
+    def find_free_day(self, day: date, earliest: date, day_counts: Dict, week_counts: Dict) -> Optional[date]:
+        candidate = day - timedelta(days=1)
+        limit = max(earliest, day - timedelta(days=self.SUGGEST_WINDOW_DAYS))
+        while candidate >= limit:
+            # Перенос внутри той же недели не меняет ее нагрузку
+            same_week = week_of(candidate) == week_of(day)
+            if (day_counts.get(candidate, 0) < self.day_capacity
+                    and (same_week or week_counts.get(week_of(candidate), 0) < self.week_capacity)):
+                return candidate
+            candidate -= timedelta(days=1)
+        return None
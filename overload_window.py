@@ -0,0 +1,98 @@
+import customtkinter as ctk
+
+
+class OverloadWindow(ctk.CTkToplevel):
+    """Перегруженные дни и недели, допустимая нагрузка и предложения переносов"""
+
+    def __init__(self, parent, detector, get_tasks, apply_moves, on_capacity_change=None):
+        super().__init__(parent)
+
+        self.detector = detector
+        self.get_tasks = get_tasks
+        self.apply_moves = apply_moves
+        self.on_capacity_change = on_capacity_change
+        self.moves = []
+
+        self.title("Перегрузка")
+        self.geometry("520x480")
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        capacity_frame = ctk.CTkFrame(self)
+        capacity_frame.pack(fill="x", padx=10, pady=10)
+
+        ctk.CTkLabel(capacity_frame, text="Важных задач в день:").pack(side="left", padx=(5, 2))
+        self.day_capacity_var = ctk.StringVar(value=str(self.detector.day_capacity))
+        ctk.CTkEntry(capacity_frame, textvariable=self.day_capacity_var, width=40).pack(side="left")
+
+        ctk.CTkLabel(capacity_frame, text="в неделю:").pack(side="left", padx=(10, 2))
+        self.week_capacity_var = ctk.StringVar(value=str(self.detector.week_capacity))
+        ctk.CTkEntry(capacity_frame, textvariable=self.week_capacity_var, width=40).pack(side="left")
+
+        ctk.CTkButton(capacity_frame, text="Задать", width=70,
+                      command=self.set_capacity).pack(side="right", padx=5)
+
+        self.error_label = ctk.CTkLabel(self, text="", text_color="#FF4444")
+        self.error_label.pack(anchor="w", padx=15)
+
+        self.report_text = ctk.CTkTextbox(self, font=ctk.CTkFont(family="Courier", size=12))
+        self.report_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        self.apply_btn = ctk.CTkButton(self, text="Применить переносы", command=self.apply)
+        self.apply_btn.pack(pady=(0, 10))
+
+    def set_capacity(self):
+        try:
+            day_capacity = int(self.day_capacity_var.get())
+            week_capacity = int(self.week_capacity_var.get())
+            if day_capacity < 1 or week_capacity < 1:
+                raise ValueError
+        except ValueError:
+            self.error_label.configure(text="Нагрузка должна быть целым числом больше нуля")
+            return
+
+        self.error_label.configure(text="")
+        self.detector.set_capacity(day_capacity, week_capacity)
+        if self.on_capacity_change:
+            self.on_capacity_change()
+        self.refresh()
+
+    def refresh(self):
+        """Перерисовать список перегрузок и пересчитать предложения"""
+        if self.detector.rebuilding:
+            lines = ["Идет анализ нагрузки..."]
+            self.moves = []
+        else:
+            self.moves = self.detector.suggest_moves(self.get_tasks())
+            with self.detector.lock:
+                days = sorted(self.detector.overloaded_days)
+                weeks = sorted(self.detector.overloaded_weeks)
+
+            lines = [f"Перегруженные дни ({len(days)}):"]
+            lines.extend(f"  {day.strftime('%d.%m.%Y')}" for day in days[:50])
+            lines.append("")
+            lines.append(f"Перегруженные недели ({len(weeks)}):")
+            lines.extend(f"  с {week.strftime('%d.%m.%Y')}" for week in weeks[:50])
+            lines.append("")
+            lines.append(f"Предлагаемые переносы ({len(self.moves)}):")
+            for task, deadline in self.moves:
+                lines.append(f"  {task.title[:24]:<24} {task.deadline.strftime('%d.%m')} -> "
+                             f"{deadline.strftime('%d.%m')}")
+
+        self.apply_btn.configure(state="normal" if self.moves else "disabled")
+
+        self.report_text.configure(state="normal")
+        self.report_text.delete("1.0", "end")
+        self.report_text.insert("1.0", "\n".join(lines))
+        self.report_text.configure(state="disabled")
+
+    def apply(self):
+        if not self.moves:
+            return
+        if not self.apply_moves(self.moves):
+            self.error_label.configure(text="Не удалось сохранить, переносы отменены")
+            return
+        self.error_label.configure(text="")
+        self.refresh()
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Callable, Optional
+
+
+class _NullSection:
+    """Пустой контекст, используемый когда замеры выключены"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    def __init__(self, monitor, name, widgets=None):
+        self.monitor = monitor
+        self.name = name
+        self.widgets = widgets
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        self.monitor.record(self.name, duration, self.widgets)
+        return False
+
+
+class PerfMonitor:
+    """Легковесные замеры времени горячих участков с кольцевым буфером"""
+
+    def __init__(self, capacity: int = 2000):
+        # Включается переменной окружения или из окна диагностики
+        self.enabled = os.environ.get("DEADLINE_CALENDAR_PROFILE") == "1"
+        self.records = deque(maxlen=capacity)
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def record(self, name: str, duration: float, widgets: Optional[int] = None):
+        """Сохранить один замер"""
+        with self.lock:
+            self.records.append({
+                "name": name,
+                "time": time.time(),
+                "duration_ms": duration * 1000,
+                "widgets": widgets,
+                "thread": threading.current_thread().name
+            })
+
+            count, total, worst = self.stats.get(name, (0, 0.0, 0.0))
+            self.stats[name] = (count + 1, total + duration, max(worst, duration))
+
+    def section(self, name: str):
+        """Контекстный менеджер для замера блока кода"""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def timed(self, name: str, widget_counter: Optional[Callable] = None):
+        """Декоратор для замера метода.
+
+        widget_counter получает первый аргумент (self) и возвращает число виджетов
+        после вызова.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    duration = time.perf_counter() - start
+                    widgets = None
+                    if widget_counter and args:
+                        try:
+                            widgets = widget_counter(args[0])
+                        except Exception:
+                            widgets = None
+                    self.record(name, duration, widgets)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self):
+        """Сводка по каждому участку: вызовы, суммарное, среднее и максимальное время"""
+        with self.lock:
+            items = list(self.stats.items())
+
+        result = []
+        for name, (count, total, worst) in sorted(items, key=lambda item: -item[1][1]):
+            result.append({
+                "name": name,
+                "calls": count,
+                "total_ms": total * 1000,
+                "avg_ms": total * 1000 / count if count else 0.0,
+                "max_ms": worst * 1000
+            })
+        return result
+
+    def recent(self, limit: int = 100):
+        """Последние замеры из кольцевого буфера"""
+        with self.lock:
+            return list(self.records)[-limit:]
+
+    def reset(self):
+        with self.lock:
+            self.records.clear()
+            self.stats.clear()
+
+    def dump(self, filename: str):
+        """Сохранить сводку и буфер замеров в JSON-файл"""
+        with self.lock:
+            records = list(self.records)
+
+        data = {
+            "enabled": self.enabled,
+            "summary": self.summary(),
+            "records": records
+        }
+
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except IOError as e:
+            print(f"Ошибка сохранения диагностики: {e}")
+
+
+def count_widgets(widget) -> int:
+    """Подсчитать все вложенные виджеты"""
+    total = 0
+    stack = list(widget.winfo_children())
+    while stack:
+        child = stack.pop()
+        total += 1
+        stack.extend(child.winfo_children())
+    return total
+
+
+# Общий экземпляр для всего приложения
+perf_monitor = PerfMonitor()
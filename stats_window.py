@@ -0,0 +1,61 @@
+import customtkinter as ctk
+
+
+class StatsWindow(ctk.CTkToplevel):
+    """Панель статистики нагрузки; значения берутся из готовых счетчиков TaskStats"""
+
+    PRIORITY_NAMES = {"High": "Высокий", "Medium": "Средний", "Low": "Низкий"}
+    BAR_WIDTH = 30
+
+    def __init__(self, parent, stats):
+        super().__init__(parent)
+
+        self.stats = stats
+
+        self.title("Статистика")
+        self.geometry("420x520")
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        counters_frame = ctk.CTkFrame(self)
+        counters_frame.pack(fill="x", padx=10, pady=10)
+
+        self.counter_labels = {}
+        for column, (key, title) in enumerate((("open", "Открытые"), ("overdue", "Просрочены"),
+                                               ("completed", "Выполнены"))):
+            counters_frame.grid_columnconfigure(column, weight=1)
+            ctk.CTkLabel(counters_frame, text=title).grid(row=0, column=column, pady=(5, 0))
+            value_label = ctk.CTkLabel(counters_frame, text="0",
+                                       font=ctk.CTkFont(size=20, weight="bold"))
+            value_label.grid(row=1, column=column, pady=(0, 5))
+            self.counter_labels[key] = value_label
+
+        self.report_text = ctk.CTkTextbox(self, font=ctk.CTkFont(family="Courier", size=12))
+        self.report_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    def refresh(self):
+        """Перерисовать панель по текущим счетчикам"""
+        snapshot = self.stats.snapshot()
+
+        for key, label in self.counter_labels.items():
+            label.configure(text=str(snapshot[key]))
+        self.counter_labels["overdue"].configure(
+            text_color="#FF6B6B" if snapshot["overdue"] else ("gray10", "gray90"))
+
+        lines = ["Открытые по приоритету:"]
+        for priority in ("High", "Medium", "Low"):
+            lines.append(f"  {self.PRIORITY_NAMES[priority]:<10}{snapshot['by_priority'].get(priority, 0):>6}")
+
+        lines.append("")
+        lines.append("Дедлайны по неделям (квартал):")
+        peak = max((count for _, count in snapshot["by_week"]), default=0) or 1
+        for week, count in snapshot["by_week"]:
+            bar = "█" * round(count / peak * self.BAR_WIDTH)
+            lines.append(f"  {week.strftime('%d.%m')}{count:>6}  {bar}")
+
+        self.report_text.configure(state="normal")
+        self.report_text.delete("1.0", "end")
+        self.report_text.insert("1.0", "\n".join(lines))
+        self.report_text.configure(state="disabled")
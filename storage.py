@@ -1,19 +1,46 @@
 import json
 import os
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 import uuid
+from perf_monitor import perf_monitor
+from file_sync import FileLock, FileWatcher
+import ics_format
+import jsonl_format
+from deadline_index import DeadlineIndex
+
+
+DEFAULT_CATEGORY = "Общая"
+# Оценка работы больше года непрерывного труда - заведомо ошибка ввода
+MAX_ESTIMATE_HOURS = 10000
+
+
+def check_estimate(value) -> float:
+    """Оценка работы в часах в допустимых границах (ValueError иначе)"""
+    estimate = float(value)
+    # Сравнение отсекает и NaN
+    if not 0 <= estimate <= MAX_ESTIMATE_HOURS:
+        raise ValueError(f"оценка работы вне диапазона 0..{MAX_ESTIMATE_HOURS} ч: {value}")
+    return estimate
 
 
 class Task:
     def __init__(self, title: str, deadline: datetime, priority: str = "Medium",
-                 description: str = "", is_completed: bool = False, task_id: Optional[str] = None):
+                 description: str = "", is_completed: bool = False, task_id: Optional[str] = None,
+                 category: str = DEFAULT_CATEGORY, depends_on: Optional[List[str]] = None,
+                 estimate_hours: float = 0.0):
         self.id = task_id or str(uuid.uuid4())
         self.title = title
         self.description = description
         self.deadline = deadline
         self.priority = priority
+        self.category = category or DEFAULT_CATEGORY
         self.is_completed = is_completed
+        # id задач, которые нужно закончить раньше этой
+        self.depends_on = list(depends_on or [])
+        # Оценка работы в часах для расчета позднего начала (проверяется и при разборе
+        # JSON/ICS, которые создают задачи через этот конструктор)
+        self.estimate_hours = check_estimate(estimate_hours)
 
     def to_dict(self):
         return {
@@ -22,7 +49,10 @@ class Task:
             "description": self.description,
             "deadline": self.deadline.isoformat(),
             "priority": self.priority,
-            "is_completed": self.is_completed
+            "category": self.category,
+            "is_completed": self.is_completed,
+            "depends_on": self.depends_on,
+            "estimate_hours": self.estimate_hours
         }
 
     @classmethod
@@ -40,56 +70,157 @@ class Task:
         priority = data["priority"]
         english_priority = priority_mapping_ru_to_en.get(priority, "Medium")
 
+        # Дедлайны хранятся в локальном времени без пояса, как и при разборе ICS
+        deadline = datetime.fromisoformat(data["deadline"])
+        if deadline.tzinfo is not None:
+            deadline = deadline.astimezone().replace(tzinfo=None)
+
         return cls(
             task_id=data["id"],
             title=data["title"],
             description=data["description"],
-            deadline=datetime.fromisoformat(data["deadline"]),
+            deadline=deadline,
             priority=english_priority,
-            is_completed=data["is_completed"]
+            # Старые файлы были без категории
+            category=data.get("category", DEFAULT_CATEGORY),
+            is_completed=data["is_completed"],
+            depends_on=data.get("depends_on"),
+            estimate_hours=data.get("estimate_hours", 0.0)
         )
 
+    def update_from(self, other: "Task"):
+        """Скопировать поля из другой версии той же задачи"""
+        self.title = other.title
+        self.description = other.description
+        self.deadline = other.deadline
+        self.priority = other.priority
+        self.category = other.category
+        self.is_completed = other.is_completed
+        self.depends_on = list(other.depends_on)
+        self.estimate_hours = other.estimate_hours
+
 
 class StorageManager:
     def __init__(self, filename: str = "data.json"):
         self.filename = filename
+        # Блокировка против одновременной записи из нескольких экземпляров приложения
+        self.lock = FileLock(filename + ".lock")
+        self.watcher = FileWatcher(filename)
+        # Строки, которые не удалось разобрать при последней загрузке/импорте JSON Lines
+        self.load_errors = []
+        self.import_errors = []
+        # Задачи, которые хранилище догрузило само при сохранении (задача перенесена
+        # в незагруженный месяц); приложение забирает их через take_loaded_tasks
+        self.loaded_tasks: List[Task] = []
+        # Бинарный индекс дедлайнов рядом с файлом данных
+        self.index = DeadlineIndex(filename + ".idx", source=filename)
 
+    @perf_monitor.timed("load_tasks")
     def load_tasks(self) -> List[Task]:
-        if not os.path.exists(self.filename):
-            return []
+        with self.lock:
+            self.watcher.refresh()
 
-        try:
-            with open(self.filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if not os.path.exists(self.filename):
+                return []
 
-            tasks = []
-            for task_data in data:
-                try:
-                    task = Task.from_dict(task_data)
-                    tasks.append(task)
-                except (KeyError, ValueError) as e:
-                    print(f"Ошибка загрузки задачи: {e}")
-                    continue
+            try:
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
 
-            return tasks
+                tasks = []
+                for task_data in data:
+                    try:
+                        task = Task.from_dict(task_data)
+                        tasks.append(task)
+                    except (KeyError, ValueError) as e:
+                        print(f"Ошибка загрузки задачи: {e}")
+                        continue
 
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Ошибка загрузки файла: {e}")
-            return []
+                self.check_index(tasks)
+                return tasks
+
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Ошибка загрузки файла: {e}")
+                return []
+
+    def file_signature(self):
+        return FileWatcher.stat(self.filename) or (0, 0)
 
-    def save_tasks(self, tasks: List[Task]):
+    def check_index(self, tasks: List[Task]):
+        """Проверить индекс дедлайнов и перестроить его, если он не соответствует файлу"""
+        if self.index is None:
+            return
         try:
-            data = [task.to_dict() for task in tasks]
+            if not (self.index.open() and self.index.is_valid(len(tasks), self.file_signature())):
+                self.index.rebuild(tasks, self.file_signature())
+        except (TypeError, ValueError, OverflowError) as e:
+            # Индекс - только ускорение: без него выборки идут обычным проходом
+            print(f"⚠️ Индекс дедлайнов отключен: {e}")
+            self.index.reset()
 
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+    def update_index(self, tasks: List[Task]):
+        if self.index is None:
+            return
+        try:
+            self.index.sync(tasks, self.file_signature())
+        except (TypeError, ValueError, OverflowError) as e:
+            print(f"⚠️ Индекс дедлайнов отключен: {e}")
+            self.index.reset()
 
-        except IOError as e:
-            print(f"Ошибка сохранения: {e}")
+    def has_external_changes(self) -> bool:
+        """Изменен ли файл данных другим процессом после нашей загрузки/записи"""
+        return self.watcher.changed()
+
+    def reload_tasks(self) -> List[Task]:
+        """Перечитать задачи после внешнего изменения"""
+        return self.load_tasks()
+
+    @perf_monitor.timed("save_tasks")
+    def save_tasks(self, tasks: List[Task], force: bool = False) -> bool:
+        """Сохранить задачи. Без force не перезаписывает файл, измененный извне."""
+        with self.lock:
+            if not force and self.watcher.changed():
+                print("⚠️ Файл данных изменен извне, сохранение отложено до перезагрузки")
+                return False
+
+            try:
+                data = [task.to_dict() for task in tasks]
+
+                # Пишем во временный файл и подменяем: при ошибке прежний файл остается целым
+                tmp_filename = self.filename + ".tmp"
+                with open(tmp_filename, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_filename, self.filename)
+
+            except (IOError, OSError) as e:
+                print(f"Ошибка сохранения: {e}")
+                return False
+
+            self.watcher.refresh()
+            self.update_index(tasks)
+            return True
+
+    def replace_tasks(self, tasks: List[Task]):
+        """Полностью заменить хранимые задачи (например, после импорта)"""
+        self.save_tasks(tasks, force=True)
+
+    def ensure_month_loaded(self, year: int, month: int) -> List[Task]:
+        """Догрузить задачи месяца; плоский файл всегда загружен целиком"""
+        return []
+
+    def take_loaded_tasks(self) -> List[Task]:
+        """Забрать задачи, догруженные при сохранении, чтобы опубликовать их в шине"""
+        with self.lock:
+            tasks, self.loaded_tasks = self.loaded_tasks, []
+            return tasks
+
+    def load_all_tasks(self, tasks: List[Task]) -> List[Task]:
+        """Все задачи для экспорта; плоский файл всегда загружен целиком"""
+        return tasks
 
     def export_tasks(self, tasks: List[Task], filename: str):
         try:
-            data = [task.to_dict() for task in tasks]
+            data = [task.to_dict() for task in self.load_all_tasks(tasks)]
 
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
@@ -115,4 +246,305 @@ class StorageManager:
 
         except (json.JSONDecodeError, IOError) as e:
             print(f"Ошибка импорта файла: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def export_ics(self, tasks: List[Task], filename: str, component: str = "VEVENT"):
+        """Поточный экспорт в iCalendar: события пишутся по одному"""
+        try:
+            with open(filename, 'w', encoding='utf-8', newline='') as f:
+                return ics_format.write_ics(self.load_all_tasks(tasks), f, component)
+        except IOError as e:
+            print(f"Ошибка экспорта: {e}")
+            return 0
+
+    def iter_ics_tasks(self, filename: str) -> Iterator[Task]:
+        """Построчный разбор VEVENT/VTODO без загрузки файла целиком"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            yield from ics_format.iter_ics_tasks(f, Task)
+
+    def import_ics(self, filename: str) -> Optional[List[Task]]:
+        try:
+            return list(self.iter_ics_tasks(filename))
+        except (IOError, UnicodeDecodeError) as e:
+            print(f"Ошибка импорта файла: {e}")
+            return None
+
+    def export_jsonl(self, tasks: List[Task], filename: str):
+        """Экспорт в JSON Lines: одна задача на строку"""
+        try:
+            with open(filename, 'w', encoding='utf-8', newline='\n') as f:
+                return jsonl_format.write_jsonl(self.load_all_tasks(tasks), f)
+        except IOError as e:
+            print(f"Ошибка экспорта: {e}")
+            return 0
+
+    def import_jsonl(self, filename: str) -> Optional[List[Task]]:
+        """Импорт JSON Lines; ошибочные строки попадают в import_errors с номерами"""
+        try:
+            tasks, self.import_errors = jsonl_format.load_jsonl(filename, Task.from_dict)
+        except (IOError, OSError) as e:
+            print(f"Ошибка импорта файла: {e}")
+            return None
+
+        for error in self.import_errors:
+            print(f"Ошибка импорта задачи, {error}")
+        return tasks
+
+
+def month_key(date: datetime) -> str:
+    return f"{date.year:04d}-{date.month:02d}"
+
+
+def shift_month(year: int, month: int, delta: int):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+class ShardedStorageManager(StorageManager):
+    """Хранилище с отдельным файлом на каждый месяц и манифестом размеров шардов.
+
+    Шарды загружаются по мере навигации по календарю, а сохранение
+    перезаписывает только изменившиеся шарды.
+    """
+
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, directory: str = "data", legacy_filename: str = "data.json"):
+        super().__init__(legacy_filename)
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, self.MANIFEST_NAME)
+        # month_key -> {"count": ..., "open": ...}
+        self.manifest: Dict[str, dict] = {}
+        self.loaded_months = set()
+        # month_key -> последнее записанное содержимое шарда
+        self.shard_cache: Dict[str, str] = {}
+
+        self.lock = FileLock(os.path.join(directory, ".lock"))
+        # Позиции задач в шардах не совпадают с порядком списка, индекс не ведется
+        self.index = None
+        # Следим за манифестом и загруженными шардами
+        self.watcher = FileWatcher(self.manifest_path)
+
+    def shard_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f).get("shards", {})
+        except (json.JSONDecodeError, IOError, AttributeError) as e:
+            print(f"Ошибка загрузки манифеста: {e}")
+            self.manifest = {}
+
+    def save_manifest(self):
+        self.write_file(self.manifest_path, json.dumps({"shards": self.manifest},
+                                                       ensure_ascii=False, indent=2))
+
+    def write_file(self, path: str, content: str):
+        # Пишем во временный файл и подменяем, чтобы шард не остался недописанным
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def read_shard(self, key: str) -> List[Task]:
+        path = self.shard_path(key)
+        if not os.path.exists(path):
+            return []
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            data = json.loads(content)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Ошибка загрузки шарда {key}: {e}")
+            return []
+
+        self.shard_cache[key] = content
+
+        tasks = []
+        for task_data in data:
+            try:
+                tasks.append(Task.from_dict(task_data))
+            except (KeyError, ValueError) as e:
+                print(f"Ошибка загрузки задачи: {e}")
+                continue
+        return tasks
+
+    def migrate_legacy_file(self):
+        """Разложить старый плоский data.json по шардам"""
+        tasks = super().load_tasks()
+        self.replace_tasks(tasks)
+        print(f"📦 {len(tasks)} задач перенесено в {self.directory}")
+
+    @perf_monitor.timed("load_tasks")
+    def load_tasks(self) -> List[Task]:
+        """Загрузить манифест и шарды вокруг текущего месяца"""
+        with self.lock:
+            if not os.path.exists(self.manifest_path):
+                os.makedirs(self.directory, exist_ok=True)
+                if os.path.exists(self.filename):
+                    self.migrate_legacy_file()
+                else:
+                    self.save_manifest()
+
+            # Соседние месяцы нужны для уведомлений и дней на краях сетки
+            now = datetime.now()
+            return self.load_months([month_key(datetime(*shift_month(now.year, now.month, delta), 1))
+                                     for delta in (-1, 0, 1)])
+
+    def load_months(self, keys: List[str]) -> List[Task]:
+        """Перечитать манифест и заданные шарды с нуля"""
+        self.load_manifest()
+        self.loaded_months.clear()
+        self.shard_cache.clear()
+        self.loaded_tasks = []
+        self.watcher = FileWatcher(self.manifest_path)
+
+        tasks = []
+        for key in keys:
+            year, month = map(int, key.split("-"))
+            tasks.extend(self.ensure_month_loaded(year, month))
+        return tasks
+
+    def reload_tasks(self) -> List[Task]:
+        """Перечитать уже загруженные месяцы после внешнего изменения"""
+        with self.lock:
+            return self.load_months(sorted(self.loaded_months))
+
+    def ensure_month_loaded(self, year: int, month: int) -> List[Task]:
+        """Загрузить шард месяца, если он еще не загружен; вернуть только новые задачи"""
+        key = f"{year:04d}-{month:02d}"
+        # Поток автосохранения в это время может обходить loaded_months и подписи наблюдателя
+        with self.lock:
+            if key in self.loaded_months:
+                return []
+
+            self.loaded_months.add(key)
+            self.watcher.add(self.shard_path(key))
+            if key not in self.manifest:
+                return []
+            return self.read_shard(key)
+
+    @perf_monitor.timed("save_tasks")
+    def save_tasks(self, tasks: List[Task], force: bool = False) -> bool:
+        """Перезаписать только те загруженные шарды, содержимое которых изменилось.
+
+        Если задача перенесена в еще не загруженный месяц, его шард догружается,
+        иначе сохранение потеряло бы прежнее содержимое шарда. Переданный список
+        не меняется: догруженные задачи копятся в loaded_tasks и пишутся вместе
+        с остальными, пока приложение не заберет их через take_loaded_tasks.
+        """
+        with self.lock:
+            if not force and self.watcher.changed():
+                print("⚠️ Файлы данных изменены извне, сохранение отложено до перезагрузки")
+                return False
+            return self.write_shards(tasks)
+
+    def write_shards(self, tasks: List[Task]) -> bool:
+        groups: Dict[str, List[Task]] = {key: [] for key in self.loaded_months}
+        for task in tasks + self.loaded_tasks:
+            groups.setdefault(month_key(task.deadline), []).append(task)
+
+        for key in [key for key in groups if key not in self.loaded_months]:
+            year, month = map(int, key.split("-"))
+            loaded_tasks = self.ensure_month_loaded(year, month)
+            self.loaded_tasks.extend(loaded_tasks)
+            groups[key].extend(loaded_tasks)
+
+        try:
+            manifest_changed = False
+            for key, shard_tasks in groups.items():
+                shard_tasks.sort(key=lambda t: t.deadline)
+                content = json.dumps([task.to_dict() for task in shard_tasks],
+                                     ensure_ascii=False, indent=2)
+                if content == self.shard_cache.get(key) or (not shard_tasks and key not in self.manifest):
+                    continue
+
+                if shard_tasks:
+                    self.write_file(self.shard_path(key), content)
+                    self.shard_cache[key] = content
+                    self.manifest[key] = {
+                        "count": len(shard_tasks),
+                        "open": sum(1 for task in shard_tasks if not task.is_completed)
+                    }
+                else:
+                    if os.path.exists(self.shard_path(key)):
+                        os.remove(self.shard_path(key))
+                    self.shard_cache.pop(key, None)
+                    self.manifest.pop(key, None)
+                manifest_changed = True
+
+            if manifest_changed:
+                self.save_manifest()
+
+        except (IOError, OSError) as e:
+            print(f"Ошибка сохранения: {e}")
+            return False
+
+        self.watcher.refresh()
+        return True
+
+    def load_all_tasks(self, tasks: List[Task]) -> List[Task]:
+        """Задачи в памяти плюс содержимое незагруженных шардов"""
+        all_tasks = list(tasks)
+        for key in sorted(set(self.manifest) - self.loaded_months):
+            all_tasks.extend(self.read_shard(key))
+        return all_tasks
+
+    def replace_tasks(self, tasks: List[Task]):
+        """Заменить все шарды: ненужные удаляются при сохранении как опустевшие"""
+        with self.lock:
+            self.loaded_months.update(self.manifest)
+            self.save_tasks(tasks, force=True)
+
+
+class JsonLinesStorageManager(StorageManager):
+    """Хранилище в формате JSON Lines с параллельным разбором больших файлов"""
+
+    def __init__(self, filename: str = "data.jsonl", legacy_filename: str = "data.json"):
+        super().__init__(filename)
+        self.legacy_filename = legacy_filename
+
+    @perf_monitor.timed("load_tasks")
+    def load_tasks(self) -> List[Task]:
+        with self.lock:
+            if not os.path.exists(self.filename) and os.path.exists(self.legacy_filename):
+                tasks = StorageManager(self.legacy_filename).load_tasks()
+                self.save_tasks(tasks, force=True)
+                print(f"📦 {len(tasks)} задач перенесено в {self.filename}")
+
+            self.watcher.refresh()
+            if not os.path.exists(self.filename):
+                return []
+
+            try:
+                tasks, self.load_errors = jsonl_format.load_jsonl(self.filename, Task.from_dict)
+            except (IOError, OSError) as e:
+                print(f"Ошибка загрузки файла: {e}")
+                return []
+
+            for error in self.load_errors:
+                print(f"Ошибка загрузки задачи, {error}")
+            self.check_index(tasks)
+            return tasks
+
+    @perf_monitor.timed("save_tasks")
+    def save_tasks(self, tasks: List[Task], force: bool = False) -> bool:
+        with self.lock:
+            if not force and self.watcher.changed():
+                print("⚠️ Файл данных изменен извне, сохранение отложено до перезагрузки")
+                return False
+
+            try:
+                tmp_filename = self.filename + ".tmp"
+                with open(tmp_filename, 'w', encoding='utf-8', newline='\n') as f:
+                    jsonl_format.write_jsonl(tasks, f)
+                os.replace(tmp_filename, self.filename)
+            except (IOError, OSError) as e:
+                print(f"Ошибка сохранения: {e}")
+                return False
+
+            self.watcher.refresh()
+            self.update_index(tasks)
+            return True
@@ -0,0 +1,168 @@
+import json
+import queue
+import threading
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+from event_bus import ChangeType
+
+
+class SyncClient:
+    """HTTP-клиент сервера синхронизации: тянет и отправляет только дельты"""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.epoch = None
+        self.version = 0
+        self.etag = None
+
+    def request(self, method: str, path: str, body=None, headers: Optional[dict] = None):
+        data = None if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json",
+                                                  **(headers or {})})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b"null"), response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, None, e.headers
+            raise
+
+    def accept(self, result: dict, etag: Optional[str]) -> List[dict]:
+        """Запомнить версию ответа; при смене эпохи сервера начать с нуля"""
+        if self.epoch is not None and result["epoch"] != self.epoch:
+            self.epoch = result["epoch"]
+            self.version = 0
+            self.etag = None
+            return self.pull()
+
+        self.epoch = result["epoch"]
+        self.version = result["version"]
+        self.etag = etag
+        return result["changes"]
+
+    def pull(self) -> List[dict]:
+        """Изменения сервера после известной версии (пусто при 304)"""
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        status, result, response_headers = self.request("GET", f"/changes?since={self.version}",
+                                                        headers=headers)
+        if status == 304:
+            return []
+        return self.accept(result, response_headers.get("ETag"))
+
+    def push(self, changes: List[dict]) -> List[dict]:
+        """Отправить локальные изменения; вернуть изменения сервера, включая конфликтные"""
+        status, result, response_headers = self.request(
+            "POST", "/changes", {"base_version": self.version, "changes": changes})
+        if result["conflicts"]:
+            print(f"⚠️ Конфликт синхронизации, взята версия сервера: {len(result['conflicts'])} задач")
+        return self.accept(result, response_headers.get("ETag"))
+
+
+class SyncService:
+    """Фоновая синхронизация задач приложения с сервером.
+
+    Локальные изменения собираются из шины событий, сетевой обмен идет в
+    отдельном потоке, а изменения сервера применяются в UI-потоке через apply_remote.
+    """
+
+    def __init__(self, client: SyncClient, get_tasks: Callable, apply_remote: Callable,
+                 interval_ms: int = 5000):
+        self.client = client
+        self.get_tasks = get_tasks
+        self.apply_remote = apply_remote
+        self.interval_ms = interval_ms
+
+        # id -> изменение для отправки; повторные правки одной задачи схлопываются
+        self.pending: Dict[str, dict] = {}
+        self.known_ids = set()
+        self.results = queue.Queue()
+        # Неотправленные изменения возвращаются в pending только из UI-потока
+        self.retry = queue.Queue()
+        self.worker = None
+        self.widget = None
+        # id задач из применяемой дельты сервера: их события не отправляем обратно,
+        # а правки из файла, пришедшие в то же время, отправляем как обычно
+        self.remote_ids = set()
+
+        # Первая синхронизация отправляет все локальные задачи;
+        # конфликтующие с сервером он не примет и вернет свою версию
+        for task in get_tasks():
+            self.queue_upsert(task)
+
+    def queue_upsert(self, task):
+        self.known_ids.add(task.id)
+        self.pending[task.id] = {"id": task.id, "deleted": False, "task": task.to_dict()}
+
+    def queue_delete(self, task_id: str):
+        self.known_ids.discard(task_id)
+        self.pending[task_id] = {"id": task_id, "deleted": True, "task": None}
+
+    def on_change(self, event):
+        """Подписчик шины событий"""
+        if event.type == ChangeType.TASKS_REPLACED:
+            current_ids = {task.id for task in event.tasks}
+            for task_id in self.known_ids - current_ids - self.remote_ids:
+                self.queue_delete(task_id)
+            for task in event.tasks:
+                if task.id not in self.remote_ids:
+                    self.queue_upsert(task)
+        elif event.task.id in self.remote_ids:
+            return
+        elif event.type == ChangeType.TASK_DELETED:
+            self.queue_delete(event.task.id)
+        else:
+            self.queue_upsert(event.task)
+
+    def start(self, widget):
+        self.widget = widget
+        self.widget.after(0, self.tick)
+
+    def tick(self):
+        """Таймер UI-потока: применить готовые результаты и запустить следующий обмен"""
+        while not self.results.empty():
+            changes = self.results.get_nowait()
+            if changes:
+                self.remote_ids = {change["id"] for change in changes}
+                try:
+                    for change in changes:
+                        if change["deleted"]:
+                            self.known_ids.discard(change["id"])
+                        else:
+                            self.known_ids.add(change["id"])
+                    self.apply_remote(changes)
+                finally:
+                    self.remote_ids = set()
+
+        while not self.retry.empty():
+            # Не затираем более свежие локальные правки
+            for change in self.retry.get_nowait():
+                self.pending.setdefault(change["id"], change)
+
+        if self.worker is None or not self.worker.is_alive():
+            outgoing = list(self.pending.values())
+            self.pending.clear()
+            self.worker = threading.Thread(target=self.exchange, args=(outgoing,), daemon=True)
+            self.worker.start()
+
+        self.widget.after(self.interval_ms, self.tick)
+
+    def exchange(self, outgoing: List[dict]):
+        try:
+            changes = self.client.push(outgoing) if outgoing else self.client.pull()
+            self.results.put(changes)
+        except urllib.error.HTTPError as e:
+            if e.code >= 500:
+                print(f"Ошибка сервера синхронизации: {e.code}")
+                self.retry.put(outgoing)
+            elif outgoing:
+                # Отказ 4xx постоянный: повтор того же пакета ничего не изменит
+                print(f"⚠️ Сервер отклонил изменения ({e.code}), не отправлено задач: {len(outgoing)}")
+        except OSError as e:
+            print(f"Ошибка синхронизации: {e}")
+            self.retry.put(outgoing)
+        except (ValueError, KeyError) as e:
+            print(f"Некорректный ответ сервера синхронизации: {e}")
@@ -0,0 +1,283 @@
+"""Локальный сервер синхронизации задач.
+
+REST API:
+    GET  /tasks                  - снимок всех задач и текущая версия
+    GET  /changes?since=N        - изменения после версии N (304, если ETag совпал)
+    POST /changes                - применить изменения клиента, в ответ - все изменения после его версии
+
+Запуск: python sync_server.py [--host 127.0.0.1] [--port 8765] [--data server_data.json]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import uuid
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from storage import StorageManager, Task
+
+
+class SaveError(Exception):
+    """Сервер не смог записать принятые изменения на диск"""
+
+
+class SyncStore:
+    """Хранилище сервера с монотонной версией и журналом последних изменений по задачам"""
+
+    def __init__(self, storage: Optional[StorageManager] = None):
+        self.storage = storage
+        # Меняется при каждом запуске: клиенты со старой эпохой начинают с версии 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.tasks: Dict[str, dict] = {}
+        # id -> версия последнего изменения; порядок вставки совпадает с порядком версий
+        self.log: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+        if storage is not None:
+            for task in storage.load_tasks():
+                self.version += 1
+                self.tasks[task.id] = task.to_dict()
+                self.log[task.id] = self.version
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.epoch}-{self.version}"'
+
+    def change_record(self, task_id: str) -> dict:
+        task = self.tasks.get(task_id)
+        return {
+            "id": task_id,
+            "version": self.log[task_id],
+            "deleted": task is None,
+            "task": task
+        }
+
+    def changes_since(self, since: int) -> List[dict]:
+        """Изменения с версией больше since; журнал обходится с конца"""
+        changes = []
+        for task_id in reversed(self.log):
+            if self.log[task_id] <= since:
+                break
+            changes.append(self.change_record(task_id))
+        changes.reverse()
+        return changes
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"epoch": self.epoch, "version": self.version,
+                    "tasks": list(self.tasks.values())}
+
+    def delta(self, since: int) -> dict:
+        with self.lock:
+            return {"epoch": self.epoch, "version": self.version,
+                    "changes": self.changes_since(since)}
+
+    @staticmethod
+    def validate(change) -> tuple:
+        """Проверить одно изменение клиента; вернуть (id, данные задачи или None для удаления)"""
+        if not isinstance(change, dict):
+            raise ValueError("изменение должно быть объектом")
+        task_id = change["id"]
+        if not isinstance(task_id, str):
+            raise ValueError("id задачи должен быть строкой")
+        deleted = change.get("deleted", False)
+        if not isinstance(deleted, bool):
+            raise ValueError("поле deleted должно быть true или false")
+        if deleted:
+            return task_id, None
+
+        # from_dict заодно приводит дедлайн с часовым поясом к локальному времени
+        data = Task.from_dict(change["task"]).to_dict()
+        if data["id"] != task_id:
+            raise ValueError("id задачи не совпадает с id изменения")
+        return task_id, data
+
+    def apply(self, base_version: int, changes: List[dict]) -> dict:
+        """Применить изменения клиента.
+
+        Пакет проверяется целиком до первой записи и применяется к копиям
+        задач и журнала; они заменяют текущие, только когда запись на диск
+        удалась, иначе SaveError. Если задачу после base_version уже изменил
+        кто-то другой, побеждает сервер: изменение клиента пропускается,
+        а актуальная версия уходит ему в ответе.
+        """
+        validated = [self.validate(change) for change in changes]
+
+        with self.lock:
+            tasks = dict(self.tasks)
+            log = dict(self.log)
+            version = self.version
+
+            conflicts = []
+            for task_id, data in validated:
+                if log.get(task_id, 0) > base_version:
+                    conflicts.append(task_id)
+                    continue
+
+                if data is None:
+                    if task_id not in tasks:
+                        continue
+                    del tasks[task_id]
+                else:
+                    tasks[task_id] = data
+                version += 1
+                # Порядок журнала совпадает с порядком версий
+                log.pop(task_id, None)
+                log[task_id] = version
+
+            if version != self.version and self.storage is not None:
+                if not self.storage.save_tasks([Task.from_dict(data) for data in tasks.values()],
+                                               force=True):
+                    raise SaveError("не удалось сохранить изменения")
+
+            self.tasks = tasks
+            self.log = log
+            self.version = version
+
+            return {"epoch": self.epoch, "version": self.version,
+                    "conflicts": conflicts, "changes": self.changes_since(base_version)}
+
+
+class SyncServer:
+    """Минимальный HTTP/1.1 сервер на asyncio поверх SyncStore"""
+
+    STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request",
+                   404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+    MAX_BODY = 64 * 1024 * 1024
+
+    def __init__(self, store: SyncStore, host: str = "127.0.0.1", port: int = 8765):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.server = None
+        self.loop = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        # При port=0 система выбирает свободный порт
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"🔁 Сервер синхронизации: http://{self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def start_in_thread(self) -> int:
+        """Запустить сервер в фоновом потоке (для локальной проверки); вернуть порт"""
+        started = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            self.loop.run_until_complete(self.start())
+            started.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        started.wait()
+        return self.port
+
+    def stop(self):
+        if self.loop is not None and self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", "0"))
+            if length > self.MAX_BODY:
+                status, body, extra = 400, {"error": "слишком большой запрос"}, {}
+            else:
+                payload = await reader.readexactly(length) if length else b""
+                status, body, extra = self.route(method, target, headers, payload)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, body, extra = 400, {"error": str(e)}, {}
+        except Exception as e:
+            # Ошибка обработки не должна обрывать соединение без ответа
+            print(f"⚠️ Ошибка обработки запроса: {e}")
+            status, body, extra = 500, {"error": "внутренняя ошибка сервера"}, {}
+
+        try:
+            await self.send(writer, status, body, extra)
+        finally:
+            writer.close()
+
+    def route(self, method: str, target: str, headers: dict, payload: bytes):
+        url = urlsplit(target)
+
+        if url.path == "/tasks":
+            if method != "GET":
+                return 405, {"error": "метод не поддерживается"}, {}
+            return self.conditional(headers, self.store.snapshot)
+
+        if url.path == "/changes":
+            if method == "GET":
+                since = int(parse_qs(url.query).get("since", ["0"])[0])
+                return self.conditional(headers, lambda: self.store.delta(since))
+            if method == "POST":
+                try:
+                    request = json.loads(payload or b"{}")
+                    if not isinstance(request, dict):
+                        raise ValueError("тело запроса должно быть объектом")
+                    changes = request.get("changes", [])
+                    if not isinstance(changes, list):
+                        raise ValueError("changes должен быть списком")
+                    result = self.store.apply(int(request.get("base_version", 0)), changes)
+                except SaveError as e:
+                    return 500, {"error": str(e)}, {}
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    return 400, {"error": f"некорректные изменения: {e}"}, {}
+                return 200, result, {"ETag": self.store.etag}
+            return 405, {"error": "метод не поддерживается"}, {}
+
+        return 404, {"error": "не найдено"}, {}
+
+    def conditional(self, headers: dict, build):
+        """Ответ 304 без тела, если версия у клиента уже актуальна"""
+        etag = self.store.etag
+        if headers.get("if-none-match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, build(), {"ETag": etag}
+
+    async def send(self, writer: asyncio.StreamWriter, status: int, body, extra_headers: dict):
+        data = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        lines = [f"HTTP/1.1 {status} {self.STATUS_TEXT.get(status, '')}",
+                 "Content-Type: application/json; charset=utf-8",
+                 f"Content-Length: {len(data)}",
+                 "Connection: close"]
+        lines.extend(f"{name}: {value}" for name, value in extra_headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер синхронизации календаря дедлайнов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default="server_data.json")
+    args = parser.parse_args()
+
+    store = SyncStore(StorageManager(args.data))
+    try:
+        asyncio.run(SyncServer(store, args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,74 @@ from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import ttk
 
+from storage import MAX_ESTIMATE_HOURS, check_estimate
+
 
 class TaskDialog(ctk.CTkToplevel):
-    def __init__(self, parent, task=None, callback=None, preset_date=None):
+    """Окно редактирования задачи.
+
+    Строится один раз: при закрытии скрывается, а open() заново заполняет
+    поля для другой задачи или даты, не создавая виджеты повторно.
+    """
+
+    def __init__(self, parent, task=None, callback=None, preset_date=None, categories=None):
         super().__init__(parent)
 
-        self.task = task
+        self.task = None
         self.callback = callback
-        self.preset_date = preset_date
+        self.preset_date = None
+        # Уже используемые категории для выпадающего списка
+        self.categories = categories or ["Общая"]
 
-        self.title("Добавить/Редактировать задачу" if task else "Добавить задачу")
-        self.geometry("500x500")
+        self.geometry("500x590")
         self.resizable(False, False)
 
         self.setup_ui()
+        # Крестик окна тоже только скрывает его
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.open(task, preset_date, categories)
+
+    def open(self, task=None, preset_date=None, categories=None):
+        """Показать окно для задачи (или новой задачи на preset_date)"""
+        self.task = task
+        self.preset_date = preset_date
+        if categories:
+            self.categories = categories
+            self.category_box.configure(values=self.categories)
+
+        self.title("Добавить/Редактировать задачу" if task else "Добавить задачу")
+
+        self.reset_fields()
         if task:
             self.load_task_data()
-        elif preset_date:
-            self.load_preset_date()
-
+            self.delete_btn.pack(side="left", padx=5)
+        else:
+            self.delete_btn.pack_forget()
+            if preset_date:
+                self.load_preset_date()
+
+        self.deiconify()
+        self.lift()
         self.grab_set()
-        self.focus_set()
+        self.title_entry.focus_set()
+
+    def close(self):
+        """Скрыть окно до следующего открытия"""
+        self.grab_release()
+        self.withdraw()
+
+    def reset_fields(self):
+        self.error_label.configure(text="")
+        self.title_entry.delete(0, "end")
+        self.desc_text.delete("1.0", "end")
+        self.date_var.set(datetime.now().strftime("%Y-%m-%d"))
+        self.hour_var.set("12")
+        self.minute_var.set("00")
+        self.estimate_var.set("0")
+        self.priority_var.set("Средний")
+        self.category_var.set("Общая")
+        self.completed_var.set(False)
 
     def setup_ui(self):
         main_frame = ctk.CTkFrame(self)
@@ -70,6 +117,11 @@ class TaskDialog(ctk.CTkToplevel):
         minute_spinbox = ctk.CTkEntry(time_frame, textvariable=self.minute_var, width=40)
         minute_spinbox.pack(side="left")
 
+        # Оценка работы: по ней считается позднее начало цепочки зависимостей
+        self.estimate_var = ctk.StringVar(value="0")
+        ctk.CTkEntry(datetime_frame, textvariable=self.estimate_var, width=50).pack(side="right")
+        ctk.CTkLabel(datetime_frame, text="Оценка, ч:").pack(side="right", padx=(10, 5))
+
         # Приоритет
         priority_frame = ctk.CTkFrame(main_frame)
         priority_frame.pack(fill="x", pady=(0, 15))
@@ -85,11 +137,27 @@ class TaskDialog(ctk.CTkToplevel):
                                     variable=self.priority_var, value=priority)
             rb.pack(side="left", padx=10)
 
+        # Категория
+        category_frame = ctk.CTkFrame(main_frame)
+        category_frame.pack(fill="x", pady=(0, 15))
+
+        ctk.CTkLabel(category_frame, text="Категория:",
+                     font=ctk.CTkFont(weight="bold")).pack(side="left", padx=(0, 10))
+
+        self.category_var = ctk.StringVar(value="Общая")
+        self.category_box = ctk.CTkComboBox(category_frame, values=self.categories,
+                                            variable=self.category_var, width=200)
+        self.category_box.pack(side="left")
+
         # Статус выполнения
         self.completed_var = ctk.BooleanVar(value=False)
         completed_cb = ctk.CTkCheckBox(main_frame, text="Задача выполнена",
                                        variable=self.completed_var)
-        completed_cb.pack(anchor="w", pady=(0, 20))
+        completed_cb.pack(anchor="w", pady=(0, 5))
+
+        # Ошибки проверки показываются прямо в окне, без отдельного Toplevel
+        self.error_label = ctk.CTkLabel(main_frame, text="", text_color="#FF4444")
+        self.error_label.pack(anchor="w", pady=(0, 5))
 
         # Кнопки
         button_frame = ctk.CTkFrame(main_frame)
@@ -100,16 +168,14 @@ class TaskDialog(ctk.CTkToplevel):
         save_btn.pack(side="right", padx=5)
 
         cancel_btn = ctk.CTkButton(button_frame, text="Отмена",
-                                   command=self.destroy, fg_color="transparent",
+                                   command=self.close, fg_color="transparent",
                                    border_width=1, text_color=("gray10", "gray90"))
         cancel_btn.pack(side="right", padx=5)
 
-        # Кнопка удаления (только для редактирования существующей задачи)
-        if self.task:
-            delete_btn = ctk.CTkButton(button_frame, text="Удалить",
-                                       command=self.confirm_delete,
-                                       fg_color="#FF4444", hover_color="#CC3333")
-            delete_btn.pack(side="left", padx=5)
+        # Кнопка удаления (показывается только для существующей задачи)
+        self.delete_btn = ctk.CTkButton(button_frame, text="Удалить",
+                                        command=self.confirm_delete,
+                                        fg_color="#FF4444", hover_color="#CC3333")
 
     def load_task_data(self):
         if self.task:
@@ -120,12 +186,14 @@ class TaskDialog(ctk.CTkToplevel):
             self.date_var.set(self.task.deadline.strftime("%Y-%m-%d"))
             self.hour_var.set(self.task.deadline.strftime("%H"))
             self.minute_var.set(self.task.deadline.strftime("%M"))
+            self.estimate_var.set(f"{self.task.estimate_hours:g}")
 
             # Конвертируем английский приоритет в русский
             priority_mapping = {"High": "Высокий", "Medium": "Средний", "Low": "Низкий"}
             russian_priority = priority_mapping.get(self.task.priority, "Средний")
             self.priority_var.set(russian_priority)
 
+            self.category_var.set(self.task.category)
             self.completed_var.set(self.task.is_completed)
 
     def load_preset_date(self):
@@ -158,6 +226,12 @@ class TaskDialog(ctk.CTkToplevel):
             self.show_error("Некорректная дата или время")
             return
 
+        try:
+            estimate_hours = check_estimate(self.estimate_var.get().replace(",", "."))
+        except ValueError:
+            self.show_error(f"Оценка - число часов от 0 до {MAX_ESTIMATE_HOURS}")
+            return
+
         # Конвертируем русский приоритет обратно в английский для хранения
         priority_mapping = {"Высокий": "High", "Средний": "Medium", "Низкий": "Low"}
         english_priority = priority_mapping.get(self.priority_var.get(), "Medium")
@@ -167,13 +241,16 @@ class TaskDialog(ctk.CTkToplevel):
             "description": self.desc_text.get("1.0", "end-1c").strip(),
             "deadline": deadline,
             "priority": english_priority,
-            "is_completed": self.completed_var.get()
+            "category": self.category_var.get().strip() or "Общая",
+            "is_completed": self.completed_var.get(),
+            "estimate_hours": estimate_hours
         }
 
-        if self.callback:
-            self.callback(task_data, self.task)
+        if self.callback and self.callback(task_data, self.task) is False:
+            self.show_error("Не удалось сохранить задачу, изменения отменены")
+            return
 
-        self.destroy()
+        self.close()
 
     def confirm_delete(self):
         """Подтверждение удаления задачи"""
@@ -183,16 +260,13 @@ class TaskDialog(ctk.CTkToplevel):
         """Удалить задачу после подтверждения"""
         if self.task and self.callback:
             # Передаем специальный сигнал для удаления
-            self.callback(None, self.task, delete=True)
-        self.destroy()
+            if self.callback(None, self.task, delete=True) is False:
+                self.show_error("Не удалось удалить задачу")
+                return
+        self.close()
 
     def show_error(self, message):
-        error_window = ctk.CTkToplevel(self)
-        error_window.title("Ошибка")
-        error_window.geometry("300x100")
-
-        ctk.CTkLabel(error_window, text=message).pack(expand=True)
-        ctk.CTkButton(error_window, text="OK", command=error_window.destroy).pack(pady=10)
+        self.error_label.configure(text=message)
 
 
 class DeleteConfirmationDialog(ctk.CTkToplevel):
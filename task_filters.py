@@ -0,0 +1,131 @@
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from event_bus import ChangeType
+
+
+class TaskFilterIndex:
+    """Фильтры по приоритету, категории и выполнению на предвычисленных множествах id.
+
+    Для каждого значения поля хранится множество id задач, поэтому сочетание
+    фильтров - пересечение множеств, а не проход по всем задачам при каждом
+    переключении. Индексы обновляются за O(1) на событие шины.
+    """
+
+    def __init__(self, tasks: Iterable = ()):
+        self.by_priority: Dict[str, Set[str]] = {}
+        self.by_category: Dict[str, Set[str]] = {}
+        self.by_completion: Dict[bool, Set[str]] = {False: set(), True: set()}
+        # id -> (приоритет, категория, выполнена), чтобы убрать задачу из старых множеств
+        self.values: Dict[str, tuple] = {}
+
+        # Активные фильтры: None - значение не ограничено
+        self.priorities: Optional[Set[str]] = None
+        self.categories: Optional[Set[str]] = None
+        self.completion: Optional[str] = None
+
+        self.matching: Optional[Set[str]] = None
+        # Фильтр читают и из потока уведомлений
+        self.lock = threading.RLock()
+        self.rebuild(tasks)
+
+    @property
+    def is_active(self) -> bool:
+        return self.priorities is not None or self.categories is not None or self.completion is not None
+
+    def rebuild(self, tasks: Iterable):
+        with self.lock:
+            self.by_priority.clear()
+            self.by_category.clear()
+            self.by_completion = {False: set(), True: set()}
+            self.values.clear()
+            for task in tasks:
+                self.add(task)
+            self.matching = None
+
+    def add(self, task):
+        with self.lock:
+            values = (task.priority, task.category, bool(task.is_completed))
+            self.values[task.id] = values
+            self.by_priority.setdefault(values[0], set()).add(task.id)
+            self.by_category.setdefault(values[1], set()).add(task.id)
+            self.by_completion[values[2]].add(task.id)
+            self.matching = None
+
+    def remove(self, task_id: str):
+        with self.lock:
+            values = self.values.pop(task_id, None)
+            if values is None:
+                return
+            self.by_priority[values[0]].discard(task_id)
+            self.by_completion[values[2]].discard(task_id)
+            category_ids = self.by_category[values[1]]
+            category_ids.discard(task_id)
+            if not category_ids:
+                # Категория без задач пропадает из списка фильтров
+                del self.by_category[values[1]]
+            self.matching = None
+
+    def on_change(self, event):
+        """Подписчик шины событий"""
+        if event.type == ChangeType.TASKS_REPLACED:
+            self.rebuild(event.tasks)
+        elif event.type == ChangeType.TASK_DELETED:
+            self.remove(event.task.id)
+        else:
+            self.remove(event.task.id)
+            self.add(event.task)
+
+    def all_categories(self):
+        return sorted(self.by_category)
+
+    def set_filters(self, priorities: Optional[Set[str]] = None, categories: Optional[Set[str]] = None,
+                    completion: Optional[str] = None):
+        """Задать активные фильтры; None снимает ограничение по полю"""
+        self.priorities = set(priorities) if priorities is not None else None
+        self.categories = set(categories) if categories is not None else None
+        self.completion = completion
+        self.matching = None
+
+    def union(self, index: Dict, keys: Set) -> Set[str]:
+        result = set()
+        for key in keys:
+            result |= index.get(key, set())
+        return result
+
+    def matching_ids(self) -> Optional[Set[str]]:
+        """id задач, проходящих все фильтры (None - фильтров нет)"""
+        with self.lock:
+            if not self.is_active:
+                return None
+            if self.matching is not None:
+                return self.matching
+
+            candidates = []
+            if self.priorities is not None:
+                candidates.append(self.union(self.by_priority, self.priorities))
+            if self.categories is not None:
+                candidates.append(self.union(self.by_category, self.categories))
+            if self.completion is not None:
+                candidates.append(self.by_completion[self.completion == "done"])
+
+            # Пересекаем начиная с самого маленького множества
+            candidates.sort(key=len)
+            matching = set(candidates[0])
+            for ids in candidates[1:]:
+                matching &= ids
+
+            self.matching = matching
+            return matching
+
+    def matches(self, task) -> bool:
+        matching = self.matching_ids()
+        if matching is None:
+            return True
+        if task.id in self.values:
+            return task.id in matching
+
+        # Задача еще не попала в индекс (например, догружена вместе с шардом)
+        return ((self.priorities is None or task.priority in self.priorities)
+                and (self.categories is None or task.category in self.categories)
+                and (self.completion is None or bool(task.is_completed) == (self.completion == "done")))
@@ -0,0 +1,203 @@
+import heapq
+import os
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from event_bus import ChangeType
+
+
+QUARTER_WEEKS = 13
+
+
+def week_start(value: datetime) -> date:
+    """Понедельник недели, в которую попадает дата"""
+    day = value.date()
+    return day - timedelta(days=day.weekday())
+
+
+class TaskStats:
+    """Счетчики нагрузки, обновляемые по событиям шины без пересчета всего списка.
+
+    Для каждой задачи запоминается ее вклад в счетчики, поэтому добавление,
+    правка, выполнение и удаление меняют только несколько чисел. Просроченные
+    задачи считаются отдельно: открытые дедлайны лежат в куче и переходят
+    в счетчик просроченных, когда наступает их время.
+    """
+
+    def __init__(self, tasks: Iterable = (), debug: Optional[bool] = None):
+        if debug is None:
+            debug = os.environ.get("DEADLINE_CALENDAR_DEBUG") == "1"
+        self.debug = debug
+
+        self.open = 0
+        self.completed = 0
+        self.overdue = 0
+        self.open_by_priority: Counter = Counter()
+        # Понедельник недели -> число открытых дедлайнов
+        self.open_by_week: Counter = Counter()
+
+        # id -> (дедлайн, приоритет, выполнена)
+        self.values: Dict[str, Tuple[datetime, str, bool]] = {}
+        # id открытых задач, уже учтенных как просроченные
+        self.overdue_ids = set()
+        # (дедлайн, id) открытых задач, еще не ставших просроченными; устаревшие записи пропускаются
+        self.pending: List[Tuple[datetime, str]] = []
+
+        self.lock = threading.RLock()
+        self.rebuild(tasks)
+
+    @property
+    def total(self) -> int:
+        return len(self.values)
+
+    def rebuild(self, tasks: Iterable, now: Optional[datetime] = None):
+        with self.lock:
+            self.open = self.completed = self.overdue = 0
+            self.open_by_priority.clear()
+            self.open_by_week.clear()
+            self.values.clear()
+            self.overdue_ids.clear()
+            self.pending = []
+            for task in tasks:
+                self.add(task, check=False)
+            self.advance(now)
+
+    def add(self, task, check: bool = True):
+        with self.lock:
+            values = (task.deadline, task.priority, bool(task.is_completed))
+            self.values[task.id] = values
+
+            if values[2]:
+                self.completed += 1
+            else:
+                self.open += 1
+                self.open_by_priority[values[1]] += 1
+                self.open_by_week[week_start(values[0])] += 1
+                heapq.heappush(self.pending, (values[0], task.id))
+
+            if check:
+                self.self_check()
+
+    def remove(self, task_id: str, check: bool = True):
+        with self.lock:
+            values = self.values.pop(task_id, None)
+            if values is None:
+                return
+
+            if values[2]:
+                self.completed -= 1
+            else:
+                self.open -= 1
+                self.decrement(self.open_by_priority, values[1])
+                self.decrement(self.open_by_week, week_start(values[0]))
+                if task_id in self.overdue_ids:
+                    self.overdue_ids.discard(task_id)
+                    self.overdue -= 1
+            # Запись в куче остается и будет отброшена при продвижении времени
+
+            if check:
+                self.self_check()
+
+    def decrement(self, counter: Counter, key):
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+
+    def on_change(self, event):
+        """Подписчик шины событий"""
+        if event.type == ChangeType.TASKS_REPLACED:
+            self.rebuild(event.tasks)
+            self.self_check(event.tasks)
+        elif event.type == ChangeType.TASK_DELETED:
+            self.remove(event.task.id)
+        else:
+            with self.lock:
+                self.remove(event.task.id, check=False)
+                self.add(event.task)
+
+    def advance(self, now: Optional[datetime] = None):
+        """Перенести в просроченные открытые задачи, дедлайн которых уже прошел"""
+        now = now or datetime.now()
+        with self.lock:
+            while self.pending and self.pending[0][0] < now:
+                deadline, task_id = heapq.heappop(self.pending)
+                values = self.values.get(task_id)
+                # Запись устарела: задачу удалили, выполнили, перенесли или уже учли
+                if (values is None or values[2] or values[0] != deadline
+                        or task_id in self.overdue_ids):
+                    continue
+                self.overdue_ids.add(task_id)
+                self.overdue += 1
+
+            # Не даем куче разрастаться из-за устаревших записей
+            if len(self.pending) > 2 * self.open + 64:
+                self.pending = [(values[0], task_id) for task_id, values in self.values.items()
+                                if not values[2] and task_id not in self.overdue_ids]
+                heapq.heapify(self.pending)
+
+    def snapshot(self, now: Optional[datetime] = None) -> dict:
+        """Текущие значения для панели статистики"""
+        now = now or datetime.now()
+        with self.lock:
+            self.advance(now)
+            first_week = week_start(now)
+            weeks = [first_week + timedelta(weeks=i) for i in range(QUARTER_WEEKS)]
+            return {
+                "total": self.total,
+                "open": self.open,
+                "completed": self.completed,
+                "overdue": self.overdue,
+                "by_priority": dict(self.open_by_priority),
+                "by_week": [(week, self.open_by_week.get(week, 0)) for week in weeks]
+            }
+
+    def recount(self, tasks: Iterable, now: Optional[datetime] = None) -> dict:
+        """Полный пересчет тех же величин проходом по списку (для проверки)"""
+        now = now or datetime.now()
+        open_tasks = [task for task in tasks if not task.is_completed]
+        completed = sum(1 for task in tasks if task.is_completed)
+        by_week = Counter(week_start(task.deadline) for task in open_tasks)
+        first_week = week_start(now)
+        weeks = [first_week + timedelta(weeks=i) for i in range(QUARTER_WEEKS)]
+        return {
+            "total": len(open_tasks) + completed,
+            "open": len(open_tasks),
+            "completed": completed,
+            "overdue": sum(1 for task in open_tasks if task.deadline < now),
+            "by_priority": dict(Counter(task.priority for task in open_tasks)),
+            "by_week": [(week, by_week.get(week, 0)) for week in weeks]
+        }
+
+    def self_check(self, tasks: Optional[Iterable] = None) -> bool:
+        """В режиме отладки сверить счетчики с полным пересчетом.
+
+        Без списка задач пересчет идет по запомненным значениям - так ловятся
+        ошибки в приращениях счетчиков; со списком - еще и расхождение с данными.
+        """
+        if not self.debug:
+            return True
+
+        now = datetime.now()
+        with self.lock:
+            if tasks is None:
+                tasks = [_Snapshot(task_id, *values) for task_id, values in self.values.items()]
+            expected = self.recount(list(tasks), now)
+            actual = self.snapshot(now)
+
+        if actual != expected:
+            mismatched = [key for key in expected if expected[key] != actual[key]]
+            print(f"⚠️ Статистика разошлась с пересчетом: {', '.join(mismatched)}")
+            return False
+        return True
+
+
+class _Snapshot:
+    """Запомненные значения задачи в виде, пригодном для recount"""
+
+    def __init__(self, task_id, deadline, priority, is_completed):
+        self.id = task_id
+        self.deadline = deadline
+        self.priority = priority
+        self.is_completed = is_completed